@@ -1,11 +1,22 @@
 import streamlit as st
 import fitz
-from openai import OpenAI
+import pypdfium2 as pdfium
+import numpy as np
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient, BadRequestError
+import asyncio
+import itertools
+import json
+import re
+import threading
+import time
+import weakref
 import os
-import tempfile
+import gzip
 import base64
-import shutil
+import hashlib
 from io import BytesIO
+from PIL import Image
+from collections import OrderedDict, Counter
 from docx import Document
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -14,72 +25,296 @@ from reportlab.lib.units import inch
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
-# PDF → 이미지 변환 및 base64 인코딩 (메모리 누수 수정)
-def convert_pdf_to_base64_images(pdf_data):
-    document = None
-    temp_dir = None
+# 동시에 보낼 수 있는 최대 API 요청 수
+MAX_CONCURRENT_REQUESTS = 10
+
+# 개별 처리 모드에서 한 요청에 묶어 보내는 연속 페이지 수
+PAGES_PER_REQUEST = 4
+# OpenAI Batch API (비용 50% 절감, 결과는 최대 24시간 뒤) - 입력 파일 크기 제한 200MB
+BATCH_API_COMPLETION_WINDOW = "24h"
+BATCH_API_MAX_FILE_BYTES = 200 * 1024 * 1024
+BATCH_API_PENDING_STATUSES = ("validating", "in_progress", "finalizing")
+
+# 스트리밍 응답을 화면에 다시 그리는 최소 간격(초) - 토큰마다 다시 그리지 않음
+STREAM_UPDATE_INTERVAL = 0.5
+
+# 일괄 처리 모드에서 한 요청에 담는 최대 페이지 수 (넘으면 나눠서 동시에 요청)
+BATCH_CHUNK_PAGES = 20
+# 일괄 처리 모드의 요청당 입력 토큰 예산 (문맥 길이의 80%에서 출력 토큰을 뺀 만큼까지 채움)
+# 문맥 길이는 모델 선택 목록 중 가장 작은 값(GPT-4o 계열 128K)으로 고정 - GPT-5 계열(400K)에는 보수적인 하한
+MODEL_CONTEXT_TOKENS = 128000
+CONTEXT_FILL_RATIO = 0.8
+
+PAGE_MARKER_PATTERN = re.compile(r"^\s*===\s*PAGE\s+(\d+)\s*===\s*$", re.MULTILINE)
+
+# 페이지 결과 연결 규칙 (문장 종결 문자, 이어 붙이면 안 되는 마크다운 블록)
+SENTENCE_END_CHARS = ('.', '!', '?', '。', '…', ':', '"', "'", ')', ']', '」', '』')
+MARKDOWN_BLOCK_PATTERN = re.compile(r"^(#|[-*+]\s|\d+[.)]\s|\||>|\$\$|```|\*\*|❌)")
+
+# 머리말/꼬리말 판정 (페이지 위/아래 몇 줄을 볼지, 몇 % 넘는 페이지에서 반복되어야 하는지)
+BOILERPLATE_EDGE_LINES = 3
+BOILERPLATE_MIN_RATIO = 0.5
+
+# 내장 텍스트가 충분한 페이지는 Vision 대신 텍스트로 처리 (최소 글자 수, 스캔본으로 볼 이미지 면적 비율)
+NATIVE_TEXT_MIN_CHARS = 200
+SCANNED_IMAGE_AREA_RATIO = 0.5
+
+# 요약과 번역을 함께 요청할 때 한 번의 응답으로 받는 JSON 형식
+COMBINED_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "summary_and_translation",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "summary": {"type": "string"},
+                "translation": {"type": "string"}
+            },
+            "required": ["summary", "translation"],
+            "additionalProperties": False
+        }
+    }
+}
+
+# 일시적인 오류(사용량 한도, 시간 초과, 연결 실패)는 SDK가 Retry-After를 따라 지수 백오프로 재시도
+API_MAX_RETRIES = 3
+
+# 페이지 렌더링 설정 (긴 변 최대 픽셀, JPEG 품질)
+RENDER_DPI = 200
+MAX_IMAGE_EDGE = 2048
+JPEG_QUALITY = 85
+
+# detail=low 요청은 API가 512px로 축소하므로 보내기 전에 긴 변을 이 크기로 줄임
+LOW_DETAIL_MAX_EDGE = 768
+# 화면 미리보기용 이미지의 최대 긴 변 (브라우저로 보내는 바이트를 줄임)
+PREVIEW_MAX_EDGE = 1024
+
+# 페이지 위/아래 빈 여백 자르기 (행 픽셀 분산이 이 값 이하면 빈 행, 내용 주변에 남길 픽셀 수)
+BLANK_ROW_VARIANCE = 5.0
+CROP_MARGIN_PX = 16
+
+# 렌더링 결과를 캐시에 보관할 최대 페이지 수, 내장 텍스트를 캐시에 보관할 최대 문서 수
+MAX_CACHED_PAGES = 100
+MAX_CACHED_DOCUMENTS = 4
+
+# 내장 텍스트 디스크 캐시 (앱을 다시 시작해도 유지) - 문서 원문이 서버에 남으므로 환경 변수로 폴더를 지정했을 때만 사용
+# 보관 문서 수를 넘으면 가장 오래 사용하지 않은 문서부터 삭제
+TEXT_DISK_CACHE_DIR = os.environ.get("PDF_AI_TEXT_CACHE_DIR")
+TEXT_DISK_CACHE_MAX_FILES = 50
+
+# PyMuPDF 내부 저장소(store)를 비우는 주기 (페이지 수)
+STORE_SHRINK_INTERVAL = 5
+
+# PDFium은 스레드 안전하지 않으므로 세션 간 렌더링을 직렬화
+_PDFIUM_LOCK = threading.Lock()
+
+# 캐시된 PyMuPDF 문서는 세션 간에 공유되므로 사용 시 직렬화
+_FITZ_LOCK = threading.Lock()
+
+# Vision 분석 결과 캐시 (같은 이미지 + 같은 설정이면 API를 다시 호출하지 않음)
+VISION_CACHE_TTL = 24 * 3600
+VISION_CACHE_MAX_ENTRIES = 200
+_VISION_CACHE_LOCK = threading.Lock()
+
+def content_row_range(pixels):
+    """행별 픽셀 분산으로 내용이 있는 행 범위 (top, bottom) 계산 - 빈 페이지면 전체 높이"""
+    height = pixels.shape[0]
+    # 열을 하나 건너 샘플링하고 float32로 계산해 큰 페이지에서도 임시 배열을 작게 유지
+    row_var = pixels.reshape(height, -1)[:, ::2].var(axis=1, dtype=np.float32)
+    content_rows = np.flatnonzero(row_var > BLANK_ROW_VARIANCE)
+    if content_rows.size == 0:
+        return 0, height
+    return max(0, int(content_rows[0]) - CROP_MARGIN_PX), min(height, int(content_rows[-1]) + 1 + CROP_MARGIN_PX)
+
+def _render_pdfium_page(pdf, page_num):
+    """pypdfium2로 페이지 하나를 JPEG 바이트로 렌더링 (비트맵은 즉시 해제)"""
+    page = pdf[page_num]
     try:
-        document = fitz.open(stream=pdf_data, filetype="pdf")
-        images = []
-        base64_images = []
-        temp_dir = tempfile.mkdtemp()
+        # 200 DPI로 렌더링하되 긴 변이 MAX_IMAGE_EDGE를 넘지 않도록 축소
+        zoom = min(RENDER_DPI / 72, MAX_IMAGE_EDGE / max(page.get_size()))
+        bitmap = page.render(scale=zoom)
+        pil_image = bitmap.to_pil()
         
-        for page_num in range(len(document)):
-            page = document[page_num]
-            # DPI를 높여서 더 선명한 이미지 생성
-            pix = page.get_pixmap(dpi=200)
-            
-            # 이미지 파일로 저장 (미리보기용)
-            img_path = os.path.join(temp_dir, f"page_{page_num+1}.png")
-            pix.save(img_path)
-            images.append(img_path)
-            
-            # base64 인코딩 (API 전송용)
-            img_bytes = pix.tobytes("png")
-            base64_img = base64.b64encode(img_bytes).decode('utf-8')
-            base64_images.append(base64_img)
-            
-            # pixmap 메모리 해제
-            pix = None
+        # 위/아래 빈 여백은 인코딩 전에 잘라내 이미지 크기와 토큰을 줄임
+        top, bottom = content_row_range(bitmap.to_numpy())
+        if bottom - top < pil_image.height:
+            pil_image = pil_image.crop((0, top, pil_image.width, bottom))
         
-        return images, base64_images
+        buffer = BytesIO()
+        pil_image.save(buffer, "JPEG", quality=JPEG_QUALITY)
         
-    except Exception as e:
-        st.error(f"PDF 변환 중 오류 발생: {e}")
-        return [], []
+        # 비트맵은 인코딩 직후 해제
+        del pil_image
+        bitmap.close()
     finally:
-        # 리소스 정리
-        if document:
-            document.close()
-        # 임시 디렉토리는 나중에 정리하기 위해 반환된 images 경로들과 함께 관리
-
-def cleanup_temp_files(temp_paths):
-    """임시 파일들을 안전하게 정리"""
-    for path in temp_paths:
+        page.close()
+    
+    return buffer.getvalue()
+
+def _render_fitz_page(document, page_num):
+    """PyMuPDF로 페이지 하나를 JPEG 바이트로 렌더링 (pypdfium2 실패 시 대체용)"""
+    page = document[page_num]
+    # 200 DPI로 렌더링하되 긴 변이 MAX_IMAGE_EDGE를 넘지 않도록 축소
+    zoom = min(RENDER_DPI / 72, MAX_IMAGE_EDGE / max(page.rect.width, page.rect.height))
+    # CMYK/회색조 페이지도 MuPDF가 바로 RGB(알파 없음)로 렌더링하도록 지정 - 이후 변환 단계가 필요 없음
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+    
+    # 위/아래 빈 여백은 인코딩 전에 잘라내 이미지 크기와 토큰을 줄임
+    # samples_mv는 pixmap 버퍼를 복사 없이 보여주므로 pixmap보다 먼저 해제해야 함
+    pixels = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+    top, bottom = content_row_range(pixels)
+    if bottom - top < pix.height:
+        # 남길 행 범위만 PIL로 넘김
+        cropped = pixels[top:bottom]
+        buffer = BytesIO()
+        Image.fromarray(cropped).save(buffer, "JPEG", quality=JPEG_QUALITY)
+        img_bytes = buffer.getvalue()
+        del cropped
+    else:
+        img_bytes = pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+    del pixels
+    
+    # pixmap은 JPEG 인코딩 직후 해제 (인코딩은 페이지당 한 번만)
+    # 파이썬 참조가 남아 있으면 MuPDF 내부 캐시도 함께 유지되므로 None 대입이 아니라 del로 지움
+    del pix
+    return img_bytes
+
+def release_fitz_memory():
+    """MuPDF 내부 저장소 캐시 비우기 (문서를 닫아도 store에 남은 메모리는 그대로 유지됨)"""
+    fitz.TOOLS.store_shrink(100)
+
+def open_pdf_document(pdf_data):
+    """pypdfium2 문서 열기 (열 수 없는 파일이면 None - PyMuPDF로 대체)"""
+    try:
+        with _PDFIUM_LOCK:
+            return pdfium.PdfDocument(pdf_data)
+    except Exception:
+        return None
+
+def close_pdf_document(pdf_doc):
+    """세션에 보관 중인 pypdfium2 문서 닫기"""
+    if pdf_doc is not None:
+        with _PDFIUM_LOCK:
+            pdf_doc.close()
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_CACHED_DOCUMENTS)
+def get_fitz_document(pdf_hash, _pdf_data):
+    """PyMuPDF 문서 핸들 - PDF 해시 단위로 한 번만 파싱해 페이지 수, 텍스트 추출, 대체 렌더링에서 공유
+    
+    닫지 않고 캐시에서 제거될 때 함께 정리되도록 둠 (사용 시에는 _FITZ_LOCK 필요)"""
+    return fitz.open(stream=_pdf_data, filetype="pdf")
+
+def get_page_count(pdf_hash, pdf_data, pdf_doc=None):
+    """PDF 페이지 수 확인 (렌더링 없음)"""
+    if pdf_doc is not None:
+        return len(pdf_doc)
+    with _FITZ_LOCK:
+        return len(get_fitz_document(pdf_hash, pdf_data))
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_PAGES)
+def render_page(pdf_hash, page_num, _pdf_doc, _pdf_data):
+    """페이지 하나를 JPEG 바이트로 렌더링 - (PDF 해시, 페이지) 단위로 캐시"""
+    img_bytes = None
+    if _pdf_doc is not None:
         try:
-            if os.path.exists(path):
-                if os.path.isfile(path):
-                    os.unlink(path)
-                elif os.path.isdir(path):
-                    shutil.rmtree(path)
-        except Exception as e:
-            st.warning(f"임시 파일 정리 중 오류: {e}")
+            with _PDFIUM_LOCK:
+                img_bytes = _render_pdfium_page(_pdf_doc, page_num)
+        except Exception:
+            img_bytes = None
+    if img_bytes is None:
+        # pypdfium2가 처리하지 못하는 파일/페이지는 PyMuPDF로 렌더링
+        with _FITZ_LOCK:
+            try:
+                img_bytes = _render_fitz_page(get_fitz_document(pdf_hash, _pdf_data), page_num)
+            finally:
+                release_fitz_memory()
+    
+    return img_bytes
+
+def encode_image_base64(img_bytes):
+    """API 전송 직전에만 base64 인코딩 (캐시/미리보기에는 원본 바이트만 보관)"""
+    return base64.b64encode(img_bytes).decode('ascii')
+
+# PDF → 이미지 변환 및 base64 인코딩 (필요한 페이지만 스트리밍)
+def iter_pages(pdf_data, page_numbers, pdf_hash, pdf_doc):
+    """요청한 페이지를 한 장씩 렌더링해 (페이지 인덱스, 이미지 바이트)를 생성
+    
+    전체 페이지를 한꺼번에 만들지 않고, 이미 렌더링한 페이지는 캐시에서 가져옴"""
+    for page_num in page_numbers:
+        yield page_num, render_page(pdf_hash, page_num, pdf_doc, pdf_data)
+
+def iter_session_pages(page_numbers):
+    """현재 세션에 업로드된 PDF의 페이지 스트림"""
+    return iter_pages(st.session_state.pdf_data, page_numbers,
+                      st.session_state.last_file_hash, st.session_state.pdf_doc)
+
+def shrink_jpeg(img_bytes, max_edge):
+    """긴 변을 max_edge 이하로 줄인 JPEG (이미 작으면 그대로)"""
+    with Image.open(BytesIO(img_bytes)) as image:
+        if max(image.size) <= max_edge:
+            return img_bytes
+        # JPEG 축소 디코딩으로 전체 해상도 디코딩을 건너뜀
+        image.draft("RGB", (max_edge, max_edge))
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        buffer = BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=JPEG_QUALITY)
+    return buffer.getvalue()
+
+def iter_analysis_inputs(page_numbers, page_texts=None, image_detail="high"):
+    """분석에 보낼 페이지별 base64 이미지 스트림 (텍스트로 처리할 페이지는 렌더링하지 않고 None)
+    
+    세션 상태는 여기서(스크립트 스레드) 읽어 두므로 작업 스레드에서 순회해도 안전"""
+    is_text = [bool(page_texts and page_texts[i]) for i in range(len(page_numbers))]
+    image_pages = iter_session_pages([page_num for page_num, text in zip(page_numbers, is_text) if not text])
+    return _encode_analysis_inputs(image_pages, is_text, image_detail)
+
+def _encode_analysis_inputs(image_pages, is_text, image_detail):
+    """렌더링된 페이지를 순서대로 base64로 인코딩 (텍스트 페이지 자리는 None)"""
+    for text_page in is_text:
+        if text_page:
+            yield None
+            continue
+        _, img_bytes = next(image_pages)
+        if image_detail == "low":
+            # detail=low 요청은 어차피 축소되므로 보내기 전에 줄임
+            img_bytes = shrink_jpeg(img_bytes, LOW_DETAIL_MAX_EDGE)
+        yield encode_image_base64(img_bytes)
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_PAGES)
+def preview_image(pdf_hash, page_num, _img_bytes):
+    """화면 표시용 축소 이미지 - (PDF 해시, 페이지) 단위로 캐시해 재실행 시 다시 줄이지 않음"""
+    return shrink_jpeg(_img_bytes, PREVIEW_MAX_EDGE)
+
+def show_page_images(page_numbers, caption_prefix="페이지"):
+    """선택한 페이지만 렌더링해서 표시 (분석용 해상도 대신 미리보기 크기로 전송)"""
+    pdf_hash = st.session_state.last_file_hash
+    for page_num, img_bytes in iter_session_pages(page_numbers):
+        st.image(preview_image(pdf_hash, page_num, img_bytes), caption=f"{caption_prefix} {page_num+1}")
+
+@st.cache_resource(show_spinner=False)
+def _get_client(api_key):
+    """API 키별 OpenAI 클라이언트 (재실행과 세션 간 재사용, HTTP/2 연결 유지)"""
+    return OpenAI(api_key=api_key, max_retries=API_MAX_RETRIES, http_client=DefaultHttpxClient(http2=True))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _list_models(api_key):
+    """사용 가능한 모델 ID 목록 (5분간 캐시 - 실패한 호출은 캐시되지 않음)"""
+    return [model.id for model in _get_client(api_key).models.list().data]
 
 def validate_openai_api_key(api_key):
     """OpenAI API 키 유효성 검사"""
     try:
-        client = OpenAI(api_key=api_key)
-        # 간단한 API 호출로 키 유효성 검사
-        response = client.models.list()
-        
-        # 사용 가능한 모델 확인 (GPT-5 모델 사용 가능 여부 체크)
-        available_models = [model.id for model in response.data]
+        # 간단한 API 호출로 키 유효성 검사 (같은 키는 캐시된 결과 사용)
+        available_models = _list_models(api_key)
         
         # GPT-5 모델 사용 가능 여부 확인
         gpt5_available = any("gpt-5" in model for model in available_models)
         
-        return client, True, None
+        return _get_client(api_key), True, None
     except Exception as e:
+        # 잘못된 키로 만든 클라이언트는 캐시에 남기지 않음
+        _get_client.clear(api_key)
         error_msg = str(e)
         if "Incorrect API key" in error_msg:
             return None, False, "잘못된 API 키입니다."
@@ -90,71 +325,371 @@ def validate_openai_api_key(api_key):
         else:
             return None, False, f"API 키 검증 오류: {error_msg}"
 
-def extract_context_for_next_page(content, max_length=800):
-    """다음 페이지를 위한 문맥 추출"""
-    if not content:
+def normalize_boilerplate_line(line):
+    """페이지 번호처럼 페이지마다 바뀌는 숫자는 무시하고 비교하도록 정규화"""
+    return re.sub(r"\d+", "#", line.strip())
+
+def detect_boilerplate_lines(page_texts, edge_lines=BOILERPLATE_EDGE_LINES, min_ratio=BOILERPLATE_MIN_RATIO):
+    """페이지 위/아래 edge_lines 줄 중 min_ratio를 넘는 페이지에서 반복되는 줄(머리말/꼬리말)의 정규화 집합"""
+    header_candidates = Counter()
+    footer_candidates = Counter()
+    n_pages = 0
+    for text in page_texts:
+        lines = [normalize_boilerplate_line(line) for line in text.split('\n') if line.strip()]
+        if not lines:
+            continue
+        n_pages += 1
+        header_candidates.update(set(lines[:edge_lines]))
+        footer_candidates.update(set(lines[-edge_lines:]))
+    
+    if n_pages < 3:
+        return frozenset()
+    return frozenset(
+        line
+        for candidates in (header_candidates, footer_candidates)
+        for line, count in candidates.items()
+        if count >= 2 and count / n_pages > min_ratio
+    )
+
+def looks_scanned(page):
+    """페이지 면적 대비 이미지 면적 비율로 스캔본 페이지인지 판단"""
+    page_area = page.rect.width * page.rect.height
+    if not page_area:
+        return True
+    # get_text("dict")와 달리 이미지 데이터를 읽지 않고 위치 정보만 가져옴
+    image_area = sum(fitz.Rect(info["bbox"]).get_area() for info in page.get_image_info())
+    return image_area / page_area > SCANNED_IMAGE_AREA_RATIO
+
+def load_cached_page_texts(pdf_hash):
+    """디스크 캐시에서 페이지별 내장 텍스트 읽기 (없거나 읽을 수 없으면 None) - 읽은 파일은 최근 사용으로 표시"""
+    path = os.path.join(TEXT_DISK_CACHE_DIR, f"{pdf_hash}.json.gz")
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            page_texts = json.load(f)
+        # atime은 마운트 옵션에 따라 갱신되지 않으므로 수정 시각으로 사용 순서를 기록
+        os.utime(path)
+        return page_texts
+    except (OSError, ValueError):
+        return None
+
+def store_cached_page_texts(pdf_hash, page_texts):
+    """페이지별 내장 텍스트를 디스크 캐시에 저장하고 보관 문서 수를 넘은 오래된 파일 삭제"""
+    try:
+        os.makedirs(TEXT_DISK_CACHE_DIR, exist_ok=True)
+        path = os.path.join(TEXT_DISK_CACHE_DIR, f"{pdf_hash}.json.gz")
+        # 다른 세션이 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(page_texts, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        
+        entries = [entry for entry in os.scandir(TEXT_DISK_CACHE_DIR) if entry.name.endswith(".json.gz")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[TEXT_DISK_CACHE_MAX_FILES:]:
+            os.remove(entry.path)
+    except OSError:
+        # 디스크 캐시는 보조 수단이므로 쓰기에 실패해도 분석은 계속 진행
+        pass
+
+# 메모리에 최근 문서를 캐시하고, 디스크 캐시를 켠 경우에는 앱을 다시 시작해도 같은 PDF를 다시 추출하지 않음
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_DOCUMENTS)
+def extract_page_texts(pdf_hash, _pdf_data):
+    """PDF에 내장된 텍스트를 페이지별로 추출 (본문이 있는 스캔본 페이지는 빈 문자열) - PDF 해시 단위로 캐시"""
+    if TEXT_DISK_CACHE_DIR:
+        page_texts = load_cached_page_texts(pdf_hash)
+        if page_texts is not None:
+            return page_texts
+    
+    page_texts = []
+    with _FITZ_LOCK:
+        try:
+            for page_num, page in enumerate(get_fitz_document(pdf_hash, _pdf_data), start=1):
+                text = page.get_text("text")
+                # 본문이 짧은 페이지는 어차피 이미지로 처리하므로 이미지 면적 검사(내용 스트림 재해석)를 건너뜀
+                if len(text.strip()) > NATIVE_TEXT_MIN_CHARS and looks_scanned(page):
+                    text = ""
+                page_texts.append(text)
+                del page
+                # 긴 문서에서 페이지별 캐시가 쌓여 최대 메모리가 커지지 않도록 주기적으로 정리
+                if page_num % STORE_SHRINK_INTERVAL == 0:
+                    release_fitz_memory()
+        finally:
+            release_fitz_memory()
+    
+    if TEXT_DISK_CACHE_DIR:
+        store_cached_page_texts(pdf_hash, page_texts)
+    return page_texts
+
+def strip_boilerplate(lines, boilerplate_lines, edge_lines=BOILERPLATE_EDGE_LINES):
+    """페이지 위/아래 edge_lines 줄 안에 있는 머리말/꼬리말 줄 제거"""
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    edge_indexes = set(non_empty[:edge_lines]) | set(non_empty[-edge_lines:])
+    kept = [line for i, line in enumerate(lines)
+            if i not in edge_indexes or normalize_boilerplate_line(line) not in boilerplate_lines]
+    # 본문까지 모두 지워지는 짧은 페이지는 그대로 둠
+    if any(line.strip() for line in kept):
+        lines = kept
+    
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return lines
+
+def native_text_for_analysis(text, boilerplate_lines=frozenset()):
+    """텍스트만으로 처리할 수 있는 페이지면 머리말/꼬리말을 뺀 본문, 아니면 빈 문자열"""
+    if len(text.strip()) <= NATIVE_TEXT_MIN_CHARS:
         return ""
+    return '\n'.join(strip_boilerplate(text.strip().split('\n'), boilerplate_lines))
+
+def stitch_pages(results, boilerplate_lines=frozenset(), standalone_pages=frozenset()):
+    """페이지별 결과를 로컬 규칙으로 연결 (반복 머리말/꼬리말 제거 + 끊어진 문장 잇기)
     
-    lines = content.split('\n')
-    context_lines = []
-    current_length = 0
-    
-    for line in reversed(lines[-10:]):
-        line = line.strip()
-        if line and current_length + len(line) < max_length:
-            context_lines.insert(0, line)
-            current_length += len(line) + 1
-        elif current_length > 0:
-            break
-    
-    return '\n'.join(context_lines).strip()
-
-def extract_overlap_context(content, max_length=400):
-    """페이지 겹침을 위한 문맥"""
-    if not content:
-        return "", ""
-    
-    lines = content.split('\n')
-    non_empty_lines = [line.strip() for line in lines if line.strip()]
-    
-    if not non_empty_lines:
-        return "", ""
-    
-    # 시작 부분
-    start_context = []
-    start_length = 0
-    for line in non_empty_lines[:5]:
-        if start_length + len(line) < max_length:
-            start_context.append(line)
-            start_length += len(line)
-        else:
-            break
-    
-    # 끝 부분
-    end_context = []
-    end_length = 0
-    for line in reversed(non_empty_lines[-5:]):
-        if end_length + len(line) < max_length:
-            end_context.insert(0, line)
-            end_length += len(line)
-        else:
-            break
+    standalone_pages에 있는 페이지 인덱스(다른 페이지 결과를 재사용한 중복 페이지)는 앞뒤와 이어 붙이지 않음"""
+    indexes = [i for i, result in enumerate(results) if result]
+    pages = [[line.rstrip() for line in results[i].strip().split('\n')] for i in indexes]
+    
+    # 결과에 옮겨진 머리말/꼬리말은 문서 원문에서 반복이 확인된 줄만 제거
+    # (페이지마다 비슷한 결과 제목은 원문에 없으므로 그대로 유지 - 원문 검출과 같은 위/아래 줄 범위 사용)
+    if boilerplate_lines:
+        pages = [strip_boilerplate(lines, boilerplate_lines) for lines in pages]
+    
+    stitched = []
+    prev_index = None
+    for page_index, lines in zip(indexes, pages):
+        if not lines:
+            continue
+        joinable = prev_index not in standalone_pages and page_index not in standalone_pages
+        prev_index = page_index
+        if stitched:
+            prev_last = stitched[-1].strip()
+            next_first = lines[0].strip()
+            # 앞 페이지가 영문 문장 중간에서 끝났고 다음 페이지가 영문 소문자로 이어질 때만 붙임
+            # (한국어 결과는 "~음"처럼 마침표 없이 끝나도 문장이 끝난 것일 수 있어 이어 붙이지 않음)
+            if (joinable and prev_last and next_first
+                    and prev_last[-1].isascii()
+                    and not prev_last.endswith(SENTENCE_END_CHARS)
+                    and not MARKDOWN_BLOCK_PATTERN.match(prev_last)
+                    and not MARKDOWN_BLOCK_PATTERN.match(next_first)
+                    and next_first[0].isascii() and next_first[0].islower()):
+                # 줄 끝 하이픈으로 나뉜 단어는 하이픈을 빼고 합침
+                if prev_last.endswith('-'):
+                    stitched[-1] = stitched[-1].rstrip()[:-1] + lines[0].lstrip()
+                else:
+                    stitched[-1] = stitched[-1].rstrip() + ' ' + lines[0].lstrip()
+                stitched.extend(lines[1:])
+                continue
+            stitched.append('')
+        stitched.extend(lines)
     
-    return '\n'.join(start_context), '\n'.join(end_context)
+    return '\n'.join(stitched)
 
-# GPT Vision API로 이미지 분석 (개별 처리 버전) - 에러 처리 개선
-def analyze_single_image_with_context(client, base64_img, prompt_type, model, max_tokens, image_detail, page_num, total_pages, previous_context="", next_page_start=""):
-    if not client or not base64_img:
+def check_image_size(page_num, base64_img):
+    """이미지 크기 검증 (20MB 제한)"""
+    img_size = len(base64_img) * 3 / 4  # base64 디코딩 후 크기 추정
+    if img_size > 20 * 1024 * 1024:
+        st.error(f"이미지 {page_num}이 너무 큽니다 ({img_size/1024/1024:.1f}MB). 20MB 이하로 줄여주세요.")
+        return False
+    return True
+
+def estimate_text_tokens(text):
+    """텍스트 토큰 수 추정 (UTF-8 3바이트당 1토큰 - 한글은 글자당 약 1토큰, 영어는 넉넉하게 잡힘)"""
+    return len(text.encode('utf-8')) // 3 + 1
+
+def estimate_image_tokens(base64_img, image_detail):
+    """OpenAI 이미지 토큰 계산식으로 추정 (low는 85, high는 2048px 안에 맞추고 짧은 변 768px로 줄인 뒤 512px 타일당 170 + 85)"""
+    if image_detail == "low":
+        return 85
+    # 헤더만 읽으므로 이미지 전체를 디코딩하지 않음
+    with Image.open(BytesIO(base64.b64decode(base64_img))) as image:
+        width, height = image.size
+    scale = min(1.0, 2048 / max(width, height))
+    scale *= min(1.0, 768 / (min(width, height) * scale))
+    tiles = -(-int(width * scale) // 512) * -(-int(height * scale) // 512)
+    return 85 + 170 * tiles
+
+def pack_page_chunks(base64_images, page_texts, image_detail, max_tokens, prompt, max_pages=BATCH_CHUNK_PAGES):
+    """페이지를 순서대로 묶은 요청 구간 [(start, end), ...] - 입력 토큰 추정치가 예산을 넘거나 max_pages에 이르면 새 구간"""
+    budget = MODEL_CONTEXT_TOKENS * CONTEXT_FILL_RATIO - max_tokens - estimate_text_tokens(prompt)
+    chunk_ranges = []
+    start = 0
+    used_tokens = 0
+    for i, (img, text) in enumerate(zip(base64_images, page_texts)):
+        page_tokens = estimate_text_tokens(text) if text else estimate_image_tokens(img, image_detail)
+        if i > start and (used_tokens + page_tokens > budget or i - start >= max_pages):
+            chunk_ranges.append((start, i))
+            start = i
+            used_tokens = 0
+        used_tokens += page_tokens
+    if start < len(base64_images):
+        chunk_ranges.append((start, len(base64_images)))
+    return chunk_ranges
+
+@st.cache_resource
+def get_vision_cache():
+    """Vision 분석 결과 저장소 (재실행과 세션 간 공유)"""
+    return OrderedDict()
+
+def vision_cache_key(base64_imgs, *settings):
+    """이미지(또는 추출 텍스트) 내용 해시 + 처리 설정으로 캐시 키 생성"""
+    digest = hashlib.sha256()
+    for base64_img in base64_imgs:
+        digest.update(base64_img.encode('utf-8'))
+    return (digest.hexdigest(),) + settings
+
+def get_cached_vision_result(key):
+    """캐시된 분석 결과 조회 (만료된 항목은 삭제)"""
+    cache = get_vision_cache()
+    with _VISION_CACHE_LOCK:
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.time() - stored_at > VISION_CACHE_TTL:
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return result
+
+def store_vision_result(key, result):
+    """분석 결과 저장 (가장 오래 사용하지 않은 항목부터 제거)"""
+    cache = get_vision_cache()
+    with _VISION_CACHE_LOCK:
+        cache[key] = (time.time(), result)
+        cache.move_to_end(key)
+        while len(cache) > VISION_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+# 비동기 클라이언트별 동시 요청 한도 - 같은 클라이언트로 보내는 모든 API 요청이 슬롯 하나씩 차지
+_REQUEST_SLOTS = weakref.WeakKeyDictionary()
+
+def request_slots(client):
+    """비동기 클라이언트 하나가 공유하는 동시 요청 세마포어 (MAX_CONCURRENT_REQUESTS개)"""
+    slots = _REQUEST_SLOTS.get(client)
+    if slots is None:
+        slots = _REQUEST_SLOTS[client] = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return slots
+
+async def acreate_completion(client, **kwargs):
+    """동시 요청 한도 안에서 chat.completions.create 호출 (응답을 받을 때까지 슬롯 유지)"""
+    async with request_slots(client):
+        return await client.chat.completions.create(**kwargs)
+
+async def astream_completion_text(client, placeholder, on_first_token=None, **kwargs):
+    """스트리밍으로 응답을 받으며 지금까지 생성된 텍스트를 placeholder에 표시 - (전체 텍스트, finish_reason)
+    
+    on_first_token은 첫 응답 조각을 받았을 때(입력 처리가 끝났을 때) 한 번 호출"""
+    # 스트림을 끝까지 받을 때까지 요청 슬롯 하나를 차지
+    async with request_slots(client):
+        stream = await client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs)
+        parts = []
+        finish_reason = None
+        last_update = 0.0
+        async for chunk in stream:
+            if on_first_token:
+                on_first_token()
+                on_first_token = None
+            # 마지막 조각에만 사용량이 담김 - 프롬프트 캐시로 할인된 입력 토큰 수 안내
+            usage = getattr(chunk, "usage", None)
+            cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) if usage else 0
+            if cached_tokens:
+                st.caption(f"♻️ 입력 토큰 {usage.prompt_tokens}개 중 {cached_tokens}개는 프롬프트 캐시에서 처리되었습니다.")
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.delta and choice.delta.content:
+                parts.append(choice.delta.content)
+                if time.monotonic() - last_update > STREAM_UPDATE_INTERVAL:
+                    placeholder.markdown(''.join(parts))
+                    last_update = time.monotonic()
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+        # 완성된 결과는 결과 영역에 표시되므로 진행 중 미리보기는 지움
+        placeholder.empty()
+        return ''.join(parts), finish_reason
+
+def create_async_client(client):
+    """동기 클라이언트와 같은 설정의 비동기 클라이언트 생성
+    
+    HTTP/2로 동시 요청을 한 연결에 다중화해 요청마다 TCP/TLS 연결을 새로 맺지 않음"""
+    return AsyncOpenAI(api_key=client.api_key, base_url=client.base_url, max_retries=API_MAX_RETRIES,
+                       http_client=DefaultAsyncHttpxClient(http2=True))
+
+def parse_combined_response(response):
+    """요약/번역 통합 응답을 {"summary": ..., "translation": ...}로 변환 (잘렸거나 형식이 틀리면 None)"""
+    if not response.choices or not response.choices[0].message or not response.choices[0].message.content:
         return None
-        
-    if prompt_type == "summary":
-        context_info = ""
-        if previous_context:
-            context_info += f"\n**이전 페이지 마지막 내용**:\n{previous_context}\n"
-        if next_page_start:
-            context_info += f"\n**다음 페이지 시작 내용** (참고용):\n{next_page_start}\n"
-            
-        system_prompt = f"""당신은 전문 문서 요약 전문가입니다. 현재 {total_pages}페이지 중 {page_num}페이지를 분석하고 있습니다.
+    choice = response.choices[0]
+    if choice.finish_reason == 'length':
+        return None
+    try:
+        data = json.loads(choice.message.content)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    outputs = {prompt_type: data.get(prompt_type) for prompt_type in ("summary", "translation")}
+    if not all(isinstance(output, str) and output.strip() for output in outputs.values()):
+        return None
+    return {prompt_type: output.strip() for prompt_type, output in outputs.items()}
+
+def build_page_content_parts(base64_images, page_texts, image_detail, first_page=1):
+    """페이지별 메시지 본문 (텍스트로 처리할 페이지는 추출 텍스트, 나머지는 이미지)"""
+    return [
+        {
+            "type": "text",
+            "text": f"**페이지 {first_page + i} 원문 (PDF에서 추출한 텍스트):**\n{text}"
+        } if text else {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:image/jpeg;base64,{base64_img}",
+                "detail": image_detail
+            }
+        } for i, (text, base64_img) in enumerate(zip(page_texts, base64_images))
+    ]
+
+# 일괄 처리 모드용 프롬프트 (모든 페이지를 한 요청에 담으므로 치환할 값 없음)
+BATCH_SUMMARY_PROMPT = """당신은 전문 문서 요약 전문가입니다. 제공된 이미지의 내용을 분석하여 다음과 같이 요약해주세요:
+
+📋 **요약 규칙:**
+- 개조식으로 요약 (~음, ~했음 어조 사용)
+- 핵심 내용과 주요 포인트 중심으로 정리
+- 마크다운 형식으로 구조화
+- 표나 그래프가 있다면 주요 데이터와 수치를 포함
+- 이미지의 전체적인 맥락과 문서 구조 고려
+- 중요한 결론이나 시사점 강조
+
+문서의 모든 중요한 정보를 빠뜨리지 말고 체계적으로 정리해주세요."""
+
+BATCH_TRANSLATION_PROMPT = """당신은 고급 전문 번역가입니다. 제공된 이미지의 내용을 정확하고 자연스럽게 한글로 번역해주세요.
+
+🌐 **번역 규칙:**
+1. **정확성**: 원문의 의미와 뉘앙스를 정확히 보존
+2. **전문성**: 학술적/기술적 용어는 적절한 한국어 전문 용어 사용
+3. **자연스러움**: 한국어 문체와 어순에 맞게 자연스럽게 번역
+4. **구조 보존**: 원문의 문단 구조와 강조점 유지
+5. **표와 데이터**: 표는 마크다운 표 형식으로 번역, 수치와 데이터는 정확히 보존
+6. **그림과 다이어그램**: 그림 내 텍스트는 모두 번역, 그림 설명과 캡션도 번역
+7. **제목과 소제목**: 적절한 한국어 제목 형식으로 번역
+
+**중요**: 단순한 단어 치환이 아닌, 의미와 맥락을 고려한 고품질 전문 번역을 수행해주세요."""
+
+# 긴 문서를 구간별로 나눠 요약한 뒤 하나의 요약으로 통합할 때 사용하는 프롬프트
+MERGE_SUMMARY_PROMPT = """당신은 전문 문서 요약 전문가입니다. 다음은 긴 문서를 앞에서부터 구간별로 나눠 만든 요약입니다.
+이 구간별 요약을 문서 전체에 대한 하나의 요약으로 통합해주세요:
+
+📋 **통합 규칙:**
+- 개조식으로 요약 (~음, ~했음 어조 사용)
+- 구간 사이에 중복되는 내용은 한 번만 정리
+- 문서의 흐름에 맞게 마크다운 형식으로 구조화
+- 표나 그래프의 주요 데이터와 수치는 그대로 유지
+- 중요한 결론이나 시사점 강조
+
+**구간별 요약:**
+{partial_summaries}"""
+
+# 페이지별 처리용 프롬프트 템플릿 (호출 시 페이지 번호만 채움)
+SUMMARY_PROMPT_TMPL = """당신은 전문 문서 요약 전문가입니다. 현재 {total_pages}페이지 중 {page_num}페이지를 분석하고 있습니다.
 
 📋 **요약 규칙:**
 - 개조식으로 요약 (~음, ~했음 어조 사용)
@@ -168,22 +703,13 @@ def analyze_single_image_with_context(client, base64_img, prompt_type, model, ma
 - 본문에서 수식 변수나 기호를 언급할 때도 LaTeX로 표현하세요 (예: "변수 $x$", "$\\beta$ 계수")
 - 그림이나 차트가 있는 경우 주요 내용과 데이터를 텍스트로 설명하세요
 
-{context_info}
-
 **주의사항**: 
-- 이전/다음 페이지와 연결되는 내용이 있다면 자연스럽게 연결하여 요약하세요
+- 이전 페이지와 연결되는 내용이 있다면 자연스럽게 연결하여 요약하세요
 - 페이지 중간에서 끊어진 문장이나 개념이 있다면 완전한 의미로 요약하세요
 - 중요한 내용이 누락되지 않도록 충분히 상세하게 요약하세요
 - 머리말/꼬리말에 나타나는 반복적인 제목이나 페이지 정보는 제외하세요"""
 
-    else:  # translation
-        context_info = ""
-        if previous_context:
-            context_info += f"\n**이전 페이지 마지막 내용**:\n{previous_context}\n"
-        if next_page_start:
-            context_info += f"\n**다음 페이지 시작 내용** (참고용):\n{next_page_start}\n"
-            
-        system_prompt = f"""당신은 고급 전문 번역가입니다. 현재 {total_pages}페이지 중 {page_num}페이지를 번역하고 있습니다.
+TRANSLATION_PROMPT_TMPL = """당신은 고급 전문 번역가입니다. 현재 {total_pages}페이지 중 {page_num}페이지를 번역하고 있습니다.
 
 🌐 **번역 규칙:**
 1. **정확성**: 원문의 의미와 뉘앙스를 정확히 보존
@@ -199,10 +725,8 @@ def analyze_single_image_with_context(client, base64_img, prompt_type, model, ma
 11. **수식 기호 설명**: 본문에서 수식의 변수나 기호를 언급할 때도 LaTeX 사용 (예: "변수 $x$는", "$\\alpha$ 계수", "$\\sigma$ 값")
 12. **출력**: 번역문만 제공, 원문과 번역문 병기 금지
 
-{context_info}
-
 **중요**: 
-- 이전/다음 페이지와 연결되는 문장이나 문단이 있다면 자연스럽게 연결하여 번역하세요
+- 이전 페이지와 연결되는 문장이나 문단이 있다면 자연스럽게 연결하여 번역하세요
 - 페이지 중간에서 끊어진 문장이 있다면 완전한 문장으로 번역하세요
 - 모든 내용을 빠뜨리지 말고 완전히 번역하세요
 - 참고문헌 목록이 포함된 경우 해당 부분은 원문 그대로 유지하세요
@@ -212,7 +736,34 @@ def analyze_single_image_with_context(client, base64_img, prompt_type, model, ma
 - 본문에서 수식의 변수나 기호를 설명할 때도 LaTeX로 표현하세요 (예: "변수 $x$는...", "$\\alpha$값이...", "$F(x)$ 함수는...")
 - 그림이나 다이어그램의 텍스트만 번역하고, 그림 설명은 간단히 추가하세요"""
 
-    messages = [
+# 요약과 번역을 한 요청으로 처리할 때의 프롬프트 템플릿
+COMBINED_PROMPT_TMPL = """요약과 번역 두 작업을 한 번에 수행합니다. 같은 입력에 대해 아래 두 규칙을 각각 따른 결과를 만들어주세요.
+
+[요약 작업]
+{summary_prompt}
+
+[번역 작업]
+{translation_prompt}
+
+**출력 형식**: JSON 객체 하나로만 답하고, "summary" 필드에는 요약 결과를, "translation" 필드에는 번역 결과를 마크다운 문자열로 넣어주세요.{page_format}"""
+
+def build_combined_prompt(summary_prompt, translation_prompt, page_markers=""):
+    """요약/번역 프롬프트를 하나의 JSON 응답 요청으로 합침 (page_markers가 있으면 필드마다 페이지 구분선 사용)"""
+    page_format = ""
+    if page_markers:
+        page_format = f"\n각 필드 안에서 페이지 결과는 반드시 아래 구분선 한 줄로 시작하고, 페이지 순서를 지켜주세요.\n{page_markers}"
+    return COMBINED_PROMPT_TMPL.format(
+        summary_prompt=summary_prompt, translation_prompt=translation_prompt, page_format=page_format
+    )
+
+def build_page_prompt(prompt_type, page_label, total_pages):
+    """페이지별 처리용 요약/번역 프롬프트 생성 (page_label은 "3" 또는 "3~6" 형식)"""
+    template = SUMMARY_PROMPT_TMPL if prompt_type == "summary" else TRANSLATION_PROMPT_TMPL
+    return template.format(page_num=page_label, total_pages=total_pages)
+
+def image_page_messages(system_prompt, base64_img, image_detail):
+    """이미지 페이지 하나를 처리하는 요청 메시지"""
+    return [
         {
             "role": "user",
             "content": [
@@ -223,7 +774,7 @@ def analyze_single_image_with_context(client, base64_img, prompt_type, model, ma
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/png;base64,{base64_img}",
+                        "url": f"data:image/jpeg;base64,{base64_img}",
                         "detail": image_detail
                     }
                 }
@@ -231,11 +782,34 @@ def analyze_single_image_with_context(client, base64_img, prompt_type, model, ma
         }
     ]
 
+def text_page_messages(system_prompt, text):
+    """내장 텍스트로 페이지 하나를 처리하는 요청 메시지"""
+    return [
+        {
+            "role": "user",
+            "content": f"{system_prompt}\n\n위 규칙에 따라 아래 현재 페이지의 텍스트(PDF에서 추출한 원문)를 정확하고 완전하게 처리해주세요. 수식과 본문의 수학 기호 모두 LaTeX 형식으로 표현하세요.\n\n**페이지 원문:**\n{text}"
+        }
+    ]
+
+# GPT Vision API로 이미지 분석 (개별 처리 버전) - 에러 처리 개선
+async def analyze_single_image_with_context(client, base64_img, prompt_type, model, max_tokens, image_detail, page_num, total_pages):
+    if not client or not base64_img:
+        return None
+    
+    cache_key = vision_cache_key([base64_img], prompt_type, model, max_tokens, image_detail, page_num, total_pages)
+    cached_result = get_cached_vision_result(cache_key)
+    if cached_result:
+        return cached_result
+    
+    system_prompt = build_page_prompt(prompt_type, page_num, total_pages)
+    messages = image_page_messages(system_prompt, base64_img, image_detail)
+
     try:
         # GPT-5 모델 사용 시 더 높은 타임아웃 설정
         timeout_seconds = 180 if model.startswith("gpt-5") else 60
         
-        response = client.chat.completions.create(
+        response = await acreate_completion(
+            client,
             model=model,
             messages=messages,
             max_completion_tokens=max_tokens,
@@ -248,6 +822,8 @@ def analyze_single_image_with_context(client, base64_img, prompt_type, model, ma
                 content = choice.message.content.strip()
                 if choice.finish_reason == 'length':
                     st.warning(f"⚠️ 페이지 {page_num}: 응답이 토큰 제한으로 잘렸습니다.")
+                else:
+                    store_vision_result(cache_key, content)
                 return content
     except Exception as e:
         error_msg = str(e)
@@ -260,84 +836,366 @@ def analyze_single_image_with_context(client, base64_img, prompt_type, model, ma
     
     return None
 
-# 기존 analyze_single_image 함수 (호환성 유지)
-def analyze_single_image(client, base64_img, prompt_type, model, max_tokens, image_detail):
-    return analyze_single_image_with_context(client, base64_img, prompt_type, model, max_tokens, image_detail, 1, 1, "")
-
-# GPT Vision API로 이미지 분석 - 에러 처리 및 검증 개선
-def analyze_images_with_gpt(client, base64_images, prompt_type="summary", model="gpt-4o-mini", max_tokens=4000, image_detail="high", process_separately=False):
-    
-    if not client:
-        st.error("OpenAI 클라이언트가 초기화되지 않았습니다.")
+async def analyze_text_page(client, text, prompt_type, model, max_tokens, page_num, total_pages):
+    """PDF에 내장된 텍스트로 페이지 하나를 처리 (이미지 없이 같은 프롬프트 사용)"""
+    if not client or not text:
         return None
+    
+    cache_key = vision_cache_key([text], prompt_type, model, max_tokens, "text", page_num, total_pages)
+    cached_result = get_cached_vision_result(cache_key)
+    if cached_result:
+        return cached_result
+    
+    system_prompt = build_page_prompt(prompt_type, page_num, total_pages)
+    messages = text_page_messages(system_prompt, text)
+    
+    try:
+        # 페이지 단위 Vision 요청과 같은 타임아웃 사용
+        timeout_seconds = 180 if model.startswith("gpt-5") else 60
         
-    if not base64_images:
-        st.error("처리할 이미지가 없습니다.")
+        response = await acreate_completion(
+            client,
+            model=model,
+            messages=messages,
+            max_completion_tokens=max_tokens,
+            timeout=timeout_seconds
+        )
+        
+        if response.choices and response.choices[0].message and response.choices[0].message.content:
+            choice = response.choices[0]
+            content = choice.message.content.strip()
+            if choice.finish_reason == 'length':
+                st.warning(f"⚠️ 페이지 {page_num}: 응답이 토큰 제한으로 잘렸습니다.")
+            else:
+                store_vision_result(cache_key, content)
+            return content
+    except Exception as e:
+        st.error(f"페이지 {page_num} 텍스트 처리 오류: {e}")
+    
+    return None
+
+def split_page_sections(content, first_page, last_page):
+    """`===PAGE n===` 구분선으로 묶음 응답을 페이지별로 분리 (구분선이 맞지 않으면 None)"""
+    parts = PAGE_MARKER_PATTERN.split(content)
+    sections = {int(num): text.strip() for num, text in zip(parts[1::2], parts[2::2])}
+    expected_pages = list(range(first_page, last_page + 1))
+    if sorted(sections) != expected_pages:
         return None
+    return [sections[page] for page in expected_pages]
+
+async def analyze_page_batch(client, base64_imgs, prompt_type, model, max_tokens, image_detail, first_page, total_pages):
+    """연속된 여러 페이지를 한 번의 Vision 요청으로 처리하고 페이지별 결과 리스트로 분리"""
+    if len(base64_imgs) == 1:
+        return [await analyze_single_image_with_context(
+            client, base64_imgs[0], prompt_type, model, max_tokens, image_detail, first_page, total_pages
+        )]
     
-    # 이미지 크기 검증
-    total_size = 0
-    for i, img in enumerate(base64_images):
-        img_size = len(img) * 3 / 4  # base64 디코딩 후 크기 추정
-        total_size += img_size
-        if img_size > 20 * 1024 * 1024:  # 20MB 제한
-            st.error(f"이미지 {i+1}이 너무 큽니다 ({img_size/1024/1024:.1f}MB). 20MB 이하로 줄여주세요.")
-            return None
+    last_page = first_page + len(base64_imgs) - 1
+    cache_key = vision_cache_key(base64_imgs, prompt_type, model, max_tokens, image_detail, first_page, total_pages)
+    cached_sections = get_cached_vision_result(cache_key)
+    if cached_sections:
+        return list(cached_sections)
     
-    if total_size > 100 * 1024 * 1024:  # 전체 100MB 제한
-        st.warning(f"전체 이미지 크기가 큽니다 ({total_size/1024/1024:.1f}MB). 처리 시간이 오래 걸릴 수 있습니다.")
+    system_prompt = build_page_prompt(prompt_type, f"{first_page}~{last_page}", total_pages)
+    page_markers = "\n".join(f"===PAGE {page}===" for page in range(first_page, last_page + 1))
+    
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": f"{system_prompt}\n\n위 규칙에 따라 아래 {len(base64_imgs)}개 페이지 이미지({first_page}~{last_page}페이지)를 순서대로 정확하고 완전하게 분석해주세요. 페이지 상단/하단의 머리말이나 꼬리말은 제외하고 본문 내용만 처리하세요. 수식과 본문의 수학 기호 모두 LaTeX 형식으로 표현하세요.\n\n**출력 형식**: 각 페이지 결과는 반드시 아래 구분선 한 줄로 시작하고, 페이지 순서를 지켜주세요.\n{page_markers}"
+                }
+            ] + [
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{base64_img}",
+                        "detail": image_detail
+                    }
+                } for base64_img in base64_imgs
+            ]
+        }
+    ]
     
-    # 개별 처리 모드
-    if process_separately and len(base64_images) > 1:
-        st.write(f"🔍 {len(base64_images)}개 이미지를 개별적으로 처리합니다...")
-        results = []
-        previous_context = ""
-        failed_pages = []
+    try:
+        # GPT-5 모델 사용 시 더 높은 타임아웃 설정
+        timeout_seconds = 180 if model.startswith("gpt-5") else 60
         
-        for i, base64_img in enumerate(base64_images):
-            st.write(f"📄 페이지 {i+1}/{len(base64_images)} 처리 중...")
-            
-            # 다음 페이지 시작 부분 미리보기
-            next_page_start = ""
-            if i < len(base64_images) - 1:
-                try:
-                    next_preview = analyze_single_image_with_context(
-                        client, base64_images[i+1], prompt_type, model, 1000, "low", 
-                        i+2, len(base64_images), "", ""
-                    )
-                    if next_preview:
-                        next_start, _ = extract_overlap_context(next_preview, 300)
-                        next_page_start = next_start
-                except Exception as e:
-                    st.warning(f"다음 페이지 미리보기 실패: {e}")
+        response = await acreate_completion(
+            client,
+            model=model,
+            messages=messages,
+            max_completion_tokens=max_tokens,
+            timeout=timeout_seconds * 2
+        )
+        
+        if response.choices and response.choices[0].message and response.choices[0].message.content:
+            choice = response.choices[0]
+            if choice.finish_reason != 'length':
+                sections = split_page_sections(choice.message.content, first_page, last_page)
+                if sections:
+                    store_vision_result(cache_key, tuple(sections))
+                    return sections
+    except Exception as e:
+        st.warning(f"페이지 {first_page}~{last_page} 묶음 처리 오류: {e}")
+    
+    # 응답이 잘렸거나 페이지 구분이 맞지 않으면 페이지별로 다시 처리
+    st.info(f"페이지 {first_page}~{last_page}: 페이지별 개별 요청으로 다시 처리합니다.")
+    results = []
+    for i, base64_img in enumerate(base64_imgs):
+        results.append(await analyze_single_image_with_context(
+            client, base64_img, prompt_type, model, max_tokens, image_detail, first_page + i, total_pages
+        ))
+    return results
+
+async def analyze_page_batch_combined(client, base64_imgs, model, max_tokens, image_detail, first_page, total_pages):
+    """이미지 페이지 묶음의 요약과 번역을 한 요청으로 처리 - {처리 유형: 페이지별 결과 리스트} (실패하면 None)"""
+    last_page = first_page + len(base64_imgs) - 1
+    cache_key = vision_cache_key(base64_imgs, "combined", model, max_tokens, image_detail, first_page, total_pages)
+    cached_sections = get_cached_vision_result(cache_key)
+    if cached_sections:
+        return {prompt_type: list(sections) for prompt_type, sections in cached_sections.items()}
+    
+    page_label = f"{first_page}~{last_page}" if len(base64_imgs) > 1 else str(first_page)
+    page_markers = "\n".join(f"===PAGE {page}===" for page in range(first_page, last_page + 1)) if len(base64_imgs) > 1 else ""
+    combined_prompt = build_combined_prompt(
+        build_page_prompt("summary", page_label, total_pages),
+        build_page_prompt("translation", page_label, total_pages),
+        page_markers
+    )
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": f"{combined_prompt}\n\n위 규칙에 따라 아래 {len(base64_imgs)}개 페이지 이미지({page_label}페이지)를 순서대로 정확하고 완전하게 분석해주세요. 페이지 상단/하단의 머리말이나 꼬리말은 제외하고 본문 내용만 처리하세요. 수식과 본문의 수학 기호 모두 LaTeX 형식으로 표현하세요."
+                }
+            ] + build_page_content_parts(base64_imgs, [""] * len(base64_imgs), image_detail)
+        }
+    ]
+    
+    try:
+        # GPT-5 모델 사용 시 더 높은 타임아웃 설정 (두 결과를 함께 생성하므로 토큰과 시간은 두 배)
+        timeout_seconds = 180 if model.startswith("gpt-5") else 60
+        
+        response = await acreate_completion(
+            client,
+            model=model,
+            messages=messages,
+            max_completion_tokens=max_tokens * 2,
+            timeout=timeout_seconds * 2,
+            response_format=COMBINED_RESPONSE_FORMAT
+        )
+        outputs = parse_combined_response(response)
+    except Exception as e:
+        st.warning(f"페이지 {page_label} 요약/번역 통합 처리 오류: {e}")
+        outputs = None
+    
+    if outputs:
+        if len(base64_imgs) == 1:
+            sections = {prompt_type: [output] for prompt_type, output in outputs.items()}
+        else:
+            sections = {prompt_type: split_page_sections(output, first_page, last_page) for prompt_type, output in outputs.items()}
+        if all(sections.values()):
+            store_vision_result(cache_key, {prompt_type: tuple(pages) for prompt_type, pages in sections.items()})
+            return sections
+    return None
+
+async def analyze_page_batch_all(client, base64_imgs, prompt_types, model, max_tokens, image_detail, first_page, total_pages):
+    """이미지 페이지 묶음을 모든 처리 유형으로 분석 - 요약과 번역은 한 요청으로 (실패하면 유형별 요청으로 다시 처리)"""
+    if set(prompt_types) == {"summary", "translation"}:
+        sections = await analyze_page_batch_combined(
+            client, base64_imgs, model, max_tokens, image_detail, first_page, total_pages
+        )
+        if sections:
+            return sections
+    
+    outputs = await asyncio.gather(*(
+        analyze_page_batch(client, base64_imgs, prompt_type, model, max_tokens, image_detail, first_page, total_pages)
+        for prompt_type in prompt_types
+    ))
+    return dict(zip(prompt_types, outputs))
+
+async def analyze_pages_concurrently(client, base64_images, total_pages, prompt_types, model, max_tokens, image_detail, on_progress=None, pages_per_request=PAGES_PER_REQUEST, page_texts=None):
+    """연속 페이지 묶음별 Vision 호출을 동시에 실행하고 ({처리 유형: 페이지별 결과 리스트}, 결과를 재사용한 페이지 인덱스 집합) 반환
+    
+    다음 페이지 묶음은 빈 요청 슬롯이 생길 때만 받아오므로 메모리에는 처리 중인 페이지만 유지됨
+    요약과 번역을 함께 요청하면 같은 페이지 묶음으로 두 요청을 동시에 보냄 (렌더링은 한 번만)
+    page_texts에 본문이 있는 페이지는 이미지 대신 텍스트로 처리
+    앞에서 나온 페이지와 내용이 같은 페이지는 요청하지 않고 첫 페이지의 결과를 그대로 사용"""
+    # 동시에 처리하는 묶음 수 (미리 렌더링해 메모리에 두는 페이지 수를 제한)
+    # 실제 API 요청 수는 acreate_completion이 요청 하나마다 슬롯을 잡아 따로 제한
+    semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENT_REQUESTS // len(prompt_types)))
+    done_pages = 0
+    seen_pages = {}       # 페이지 내용 해시 → 처음 나온 페이지 인덱스
+    duplicate_pages = {}  # 중복 페이지 인덱스 → 같은 내용의 첫 페이지 인덱스
+    
+    def batch_texts(first_page, batch):
+        return page_texts[first_page - 1:first_page - 1 + len(batch)] if page_texts else [""] * len(batch)
+    
+    def mark_duplicates(first_page, batch):
+        """묶음 안에서 앞 페이지와 내용이 같은 페이지의 위치 집합 (페이지 순서대로 호출해야 함)"""
+        duplicates = set()
+        for i, (page, text) in enumerate(zip(batch, batch_texts(first_page, batch))):
+            digest = hashlib.blake2b((text or page).encode('utf-8'), digest_size=16).digest()
+            page_index = first_page - 1 + i
+            if digest in seen_pages:
+                duplicate_pages[page_index] = seen_pages[digest]
+                duplicates.add(i)
+            else:
+                seen_pages[digest] = page_index
+        return duplicates
+    
+    async def analyze_batch(async_client, first_page, batch, duplicates):
+        nonlocal done_pages
+        try:
+            texts = batch_texts(first_page, batch)
             
-            # 문맥을 포함한 개별 처리
-            result = analyze_single_image_with_context(
-                client, base64_img, prompt_type, model, max_tokens, image_detail, 
-                i+1, len(base64_images), previous_context, next_page_start
-            )
+            # 텍스트 페이지는 각각 텍스트 요청, 나머지 연속된 이미지 페이지는 묶어서 Vision 요청 (중복 페이지는 건너뜀)
+            jobs = []
+            for kind, group in itertools.groupby(
+                range(len(batch)), key=lambda i: "duplicate" if i in duplicates else ("text" if texts[i] else "image")
+            ):
+                if kind == "duplicate":
+                    continue
+                is_text = kind == "text"
+                indexes = list(group)
+                if not is_text and not all(check_image_size(first_page + i, batch[i]) for i in indexes):
+                    continue
+                if not is_text and len(prompt_types) > 1:
+                    # 같은 이미지를 유형마다 보내지 않도록 한 요청으로 모든 유형을 처리
+                    jobs.append((None, indexes, analyze_page_batch_all(
+                        async_client, [batch[i] for i in indexes], prompt_types, model, max_tokens, image_detail,
+                        first_page + indexes[0], total_pages
+                    )))
+                    continue
+                for prompt_type in prompt_types:
+                    if is_text:
+                        jobs.extend((prompt_type, [i], analyze_text_page(
+                            async_client, texts[i], prompt_type, model, max_tokens, first_page + i, total_pages
+                        )) for i in indexes)
+                    else:
+                        jobs.append((prompt_type, indexes, analyze_page_batch(
+                            async_client, [batch[i] for i in indexes], prompt_type, model, max_tokens, image_detail,
+                            first_page + indexes[0], total_pages
+                        )))
             
-            if result:
-                results.append(result)
-                previous_context = extract_context_for_next_page(result, 800)
-                st.success(f"✅ 페이지 {i+1} 완료")
+            results = {prompt_type: [None] * len(batch) for prompt_type in prompt_types}
+            outputs = await asyncio.gather(*(job for _, _, job in jobs))
+            for (prompt_type, indexes, _), output in zip(jobs, outputs):
+                # 유형 없이 추가한 작업은 {처리 유형: 결과 리스트}를 반환
+                type_outputs = output if prompt_type is None else {prompt_type: output}
+                for output_type, type_output in type_outputs.items():
+                    for i, result in zip(indexes, type_output if isinstance(type_output, list) else [type_output]):
+                        results[output_type][i] = result
+            return results
+        finally:
+            semaphore.release()
+            done_pages += len(batch)
+            if on_progress:
+                on_progress(done_pages, total_pages)
+    
+    pages = iter(base64_images)
+    batch_sizes = []
+    tasks = []
+    async with create_async_client(client) as async_client:
+        while True:
+            await semaphore.acquire()
+            # 페이지 렌더링은 별도 스레드에서 진행되어 진행 중인 요청을 막지 않음
+            batch = await asyncio.to_thread(list, itertools.islice(pages, max(1, pages_per_request)))
+            if not batch:
+                semaphore.release()
+                break
+            first_page = sum(batch_sizes) + 1
+            tasks.append(asyncio.create_task(analyze_batch(async_client, first_page, batch, mark_duplicates(first_page, batch))))
+            batch_sizes.append(len(batch))
+        batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    results = {prompt_type: [] for prompt_type in prompt_types}
+    for size, batch_result in zip(batch_sizes, batch_results):
+        for prompt_type in prompt_types:
+            if isinstance(batch_result, Exception):
+                results[prompt_type].extend([None] * size)
             else:
-                failed_pages.append(i+1)
-                results.append(f"❌ [페이지 {i+1} 처리 실패]")
-                previous_context = ""
-                st.error(f"❌ 페이지 {i+1} 처리 실패")
-        
-        if failed_pages:
-            st.error(f"실패한 페이지: {', '.join(map(str, failed_pages))}")
-        
-        # 결과를 자연스럽게 연결
-        final_result = "\n\n".join(results)
-        
-        # 전체 문서 맥락에서 최종 정리 (실패한 페이지가 적은 경우에만)
-        if len(base64_images) > 2 and len(final_result) > 3000 and len(failed_pages) <= len(base64_images) * 0.3:
-            st.write("🔧 전체 문서 흐름 개선 중...")
-            try:
-                polish_prompt = f"""다음은 페이지별로 개별 처리된 {'요약' if prompt_type == 'summary' else '번역'} 결과입니다. 
+                results[prompt_type].extend(batch_result[prompt_type])
+    
+    if duplicate_pages:
+        st.write(f"♻️ 앞 페이지와 내용이 같은 {len(duplicate_pages)}개 페이지는 해당 페이지의 결과를 재사용했습니다.")
+        for page_index, original_index in duplicate_pages.items():
+            for prompt_type in prompt_types:
+                results[prompt_type][page_index] = results[prompt_type][original_index]
+    return results, frozenset(duplicate_pages)
+
+def report_text_pages(page_texts):
+    """이미지 대신 내장 텍스트로 처리하는 페이지 수 안내"""
+    text_page_count = sum(1 for text in page_texts if text) if page_texts else 0
+    if text_page_count:
+        st.write(f"📝 {text_page_count}개 페이지는 PDF 내장 텍스트로 처리합니다 (이미지 분석 생략).")
+
+def analyze_pages_separately(client, base64_images, total_pages, prompt_types, model, max_tokens, image_detail, pages_per_request=PAGES_PER_REQUEST, polish_with_llm=False, boilerplate_lines=frozenset(), page_texts=None):
+    """개별 처리 모드 - 페이지 묶음을 동시에 처리하고 유형별로 연결한 {처리 유형: 최종 결과} 반환"""
+    st.write(f"🔍 {total_pages}개 이미지를 개별적으로 처리합니다...")
+    progress_bar = st.progress(0.0, text="페이지 분석 준비 중...")
+    
+    def on_progress(done, total):
+        progress_bar.progress(done / total, text=f"페이지 분석 중... ({done}/{total})")
+    
+    page_results, reused_pages = asyncio.run(analyze_pages_concurrently(
+        client, base64_images, total_pages, prompt_types, model, max_tokens, image_detail, on_progress,
+        pages_per_request, page_texts
+    ))
+    progress_bar.empty()
+    
+    show_label = len(prompt_types) > 1
+    final_results = {}
+    polish_targets = {}
+    for prompt_type in prompt_types:
+        final_result, failed_count = finish_page_results(
+            page_results[prompt_type], prompt_type, boilerplate_lines, show_label, reused_pages
+        )
+        final_results[prompt_type] = final_result
+        # 요청한 경우에만 전체 문서 맥락에서 AI로 최종 정리 (실패한 페이지가 적은 경우에만)
+        if polish_with_llm and total_pages > 2 and len(final_result) > 3000 and failed_count <= total_pages * 0.3:
+            polish_targets[prompt_type] = final_result
+    
+    if polish_targets:
+        # 요약/번역 다듬기 요청은 서로 독립이므로 동시에 보냄
+        final_results.update(asyncio.run(polish_documents(client, polish_targets, model, max_tokens, show_label)))
+    return final_results
+
+def finish_page_results(page_results, prompt_type, boilerplate_lines=frozenset(), show_label=False, reused_pages=frozenset()):
+    """페이지별 결과의 성공/실패를 표시하고 하나의 문서로 연결 - (연결한 결과, 실패한 페이지 수)
+    
+    reused_pages는 앞 페이지 결과를 그대로 재사용한 페이지 인덱스 (앞뒤 페이지와 이어 붙이지 않음)"""
+    label = f"[{'요약' if prompt_type == 'summary' else '번역'}] " if show_label else ""
+    results = []
+    failed_pages = []
+    for i, result in enumerate(page_results):
+        if result:
+            results.append(result)
+            st.success(f"✅ {label}페이지 {i+1} 완료")
+        else:
+            failed_pages.append(i+1)
+            results.append(f"❌ [페이지 {i+1} 처리 실패]")
+            st.error(f"❌ {label}페이지 {i+1} 처리 실패")
+    
+    if failed_pages:
+        st.error(f"{label}실패한 페이지: {', '.join(map(str, failed_pages))}")
+    
+    # 결과를 로컬 규칙으로 자연스럽게 연결 (API 호출 없음)
+    final_result = stitch_pages(results, boilerplate_lines, reused_pages)
+    
+    return final_result, len(failed_pages)
+
+async def polish_documents(client, documents, model, max_tokens, show_label=False):
+    """{처리 유형: 연결한 결과}를 전체 문서 맥락에서 동시에 다듬기 (실패하거나 너무 짧아지면 원본 유지)"""
+    async def polish(async_client, prompt_type, final_result):
+        label = f"[{'요약' if prompt_type == 'summary' else '번역'}] " if show_label else ""
+        st.write(f"🔧 {label}전체 문서 흐름 개선 중...")
+        polish_prompt = f"""다음은 페이지별로 개별 처리된 {'요약' if prompt_type == 'summary' else '번역'} 결과입니다. 
 전체 문서의 맥락을 고려하여 다음을 개선해주세요:
 
 1. 페이지 간 연결이 부자연스러운 부분만 매끄럽게 연결
@@ -352,72 +1210,109 @@ def analyze_images_with_gpt(client, base64_images, prompt_type="summary", model=
 
 **중요**: 내용을 줄이거나 생략하지 말고, 단지 페이지 간 연결만 자연스럽게 만들어서 하나의 매끄러운 문서로 만들어주세요."""
 
-                polish_response = client.chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": polish_prompt}],
-                    max_completion_tokens=max_tokens * 2,
-                    timeout=240 if model.startswith("gpt-5") else 120
-                )
-                
-                if polish_response.choices and polish_response.choices[0].message.content:
-                    polished_result = polish_response.choices[0].message.content.strip()
-                    if len(polished_result) > len(final_result) * 0.8:
-                        final_result = polished_result
-                        st.success("✨ 최종 연결 개선 완료")
-                    else:
-                        st.warning("개선 결과가 너무 짧아서 원본 사용")
-                
-            except Exception as e:
-                st.warning(f"최종 정리 중 오류 발생 (원본 결과 사용): {e}")
-        
+        try:
+            polish_response = await acreate_completion(
+                async_client,
+                model=model,
+                messages=[{"role": "user", "content": polish_prompt}],
+                max_completion_tokens=max_tokens * 2,
+                timeout=240 if model.startswith("gpt-5") else 120
+            )
+            
+            if polish_response.choices and polish_response.choices[0].message.content:
+                polished_result = polish_response.choices[0].message.content.strip()
+                if len(polished_result) > len(final_result) * 0.8:
+                    st.success(f"✨ {label}최종 연결 개선 완료")
+                    return polished_result
+                st.warning(f"{label}개선 결과가 너무 짧아서 원본 사용")
+            
+        except Exception as e:
+            st.warning(f"{label}최종 정리 중 오류 발생 (원본 결과 사용): {e}")
         return final_result
     
-    # 기존 일괄 처리 모드
-    if prompt_type == "summary":
-        system_prompt = """당신은 전문 문서 요약 전문가입니다. 제공된 이미지의 내용을 분석하여 다음과 같이 요약해주세요:
-
-📋 **요약 규칙:**
-- 개조식으로 요약 (~음, ~했음 어조 사용)
-- 핵심 내용과 주요 포인트 중심으로 정리
-- 마크다운 형식으로 구조화
-- 표나 그래프가 있다면 주요 데이터와 수치를 포함
-- 이미지의 전체적인 맥락과 문서 구조 고려
-- 중요한 결론이나 시사점 강조
+    async with create_async_client(client) as async_client:
+        polished = await asyncio.gather(*(
+            polish(async_client, prompt_type, final_result) for prompt_type, final_result in documents.items()
+        ))
+    return dict(zip(documents, polished))
 
-문서의 모든 중요한 정보를 빠뜨리지 말고 체계적으로 정리해주세요."""
-
-    else:  # translation
-        system_prompt = """당신은 고급 전문 번역가입니다. 제공된 이미지의 내용을 정확하고 자연스럽게 한글로 번역해주세요.
+def check_batch_image_sizes(base64_images, page_texts):
+    """일괄 처리 모드에서 한 요청에 담을 이미지 크기 검증 (너무 큰 이미지가 있으면 False)"""
+    total_size = 0
+    for i, img in enumerate(base64_images):
+        if page_texts[i]:
+            continue
+        if not check_image_size(i+1, img):
+            return False
+        total_size += len(img) * 3 / 4
+    
+    if total_size > 100 * 1024 * 1024:  # 전체 100MB 제한
+        st.warning(f"전체 이미지 크기가 큽니다 ({total_size/1024/1024:.1f}MB). 처리 시간이 오래 걸릴 수 있습니다.")
+    return True
 
-🌐 **번역 규칙:**
-1. **정확성**: 원문의 의미와 뉘앙스를 정확히 보존
-2. **전문성**: 학술적/기술적 용어는 적절한 한국어 전문 용어 사용
-3. **자연스러움**: 한국어 문체와 어순에 맞게 자연스럽게 번역
-4. **구조 보존**: 원문의 문단 구조와 강조점 유지
-5. **표와 데이터**: 표는 마크다운 표 형식으로 번역, 수치와 데이터는 정확히 보존
-6. **그림과 다이어그램**: 그림 내 텍스트는 모두 번역, 그림 설명과 캡션도 번역
-7. **제목과 소제목**: 적절한 한국어 제목 형식으로 번역
+async def analyze_batch_types(client, base64_images, prompt_types, model, max_tokens, image_detail, page_texts):
+    """일괄 처리 모드에서 처리 유형별 요청을 보내고 {처리 유형: 결과} 반환
+    
+    모든 유형이 같은 문서를 보내므로 첫 유형의 응답이 시작되어(입력이 프롬프트 캐시에 올라간 뒤) 나머지 유형을 동시에 보냄"""
+    prefix_cached = asyncio.Event()
+    show_label = len(prompt_types) > 1
+    
+    async def analyze_type(async_client, prompt_type):
+        if prompt_type != prompt_types[0]:
+            await prefix_cached.wait()
+            return await analyze_images_batch(async_client, base64_images, prompt_type, model, max_tokens, image_detail, page_texts, show_label)
+        try:
+            return await analyze_images_batch(async_client, base64_images, prompt_type, model, max_tokens, image_detail, page_texts, show_label,
+                                              on_first_token=prefix_cached.set)
+        finally:
+            prefix_cached.set()
+    
+    async with create_async_client(client) as async_client:
+        results = await asyncio.gather(*(analyze_type(async_client, prompt_type) for prompt_type in prompt_types))
+    return dict(zip(prompt_types, results))
 
-**중요**: 단순한 단어 치환이 아닌, 의미와 맥락을 고려한 고품질 전문 번역을 수행해주세요."""
+async def analyze_images_batch(async_client, base64_images, prompt_type, model, max_tokens, image_detail, page_texts, show_label=False, on_first_token=None):
+    """일괄 처리 모드로 한 유형 분석 (토큰 예산을 넘으면 구간별로 나눠 동시에 요청) - 실패하면 None
+    
+    on_first_token은 응답 스트림이 시작되면 호출 (구간별 요청은 기다릴 이유가 없으므로 바로 호출)"""
+    label = f"[{'요약' if prompt_type == 'summary' else '번역'}] " if show_label else ""
+    system_prompt = BATCH_SUMMARY_PROMPT if prompt_type == "summary" else BATCH_TRANSLATION_PROMPT
 
-    st.write(f"🔍 {len(base64_images)}개 이미지 일괄 처리 중...")
+    cache_key = vision_cache_key([text or img for text, img in zip(page_texts, base64_images)], prompt_type, model, max_tokens, image_detail)
+    cached_result = get_cached_vision_result(cache_key)
+    if cached_result:
+        st.write(f"♻️ {label}{len(base64_images)}개 이미지의 이전 분석 결과를 재사용합니다.")
+        return cached_result
+    
+    # 한 요청에 다 담기지 않으면 토큰 예산에 맞춰 나눠 동시에 요청하고 순서대로 이어 붙임
+    chunk_ranges = pack_page_chunks(base64_images, page_texts, image_detail, max_tokens, system_prompt)
+    if len(chunk_ranges) > 1:
+        if on_first_token:
+            on_first_token()
+        st.write(f"🔍 {label}{len(base64_images)}개 이미지를 {len(chunk_ranges)}개 요청으로 나눠 처리 중...")
+        content, failed_ranges = await analyze_chunks_concurrently(
+            async_client, base64_images, page_texts, system_prompt, model, max_tokens, image_detail, chunk_ranges
+        )
+        if failed_ranges:
+            st.error(f"{label}실패한 페이지 구간: {', '.join(failed_ranges)}")
+            return content or None
+        if prompt_type == "summary" and content:
+            content = await merge_chunk_summaries(async_client, content, model, max_tokens, label)
+        if content:
+            store_vision_result(cache_key, content)
+        return content or None
+    
+    st.write(f"🔍 {label}{len(base64_images)}개 이미지 일괄 처리 중...")
     
+    # 문서 내용을 앞에, 유형별 지시문을 뒤에 두어 요약/번역 요청의 앞부분이 같아지도록 함 (프롬프트 캐시 적중)
     messages = [
         {
             "role": "user",
-            "content": [
+            "content": build_page_content_parts(base64_images, page_texts, image_detail) + [
                 {
                     "type": "text",
-                    "text": f"{system_prompt}\n\n위 규칙에 따라 다음 이미지들의 내용을 정확하고 상세하게 분석해주세요."
+                    "text": f"{system_prompt}\n\n위 규칙에 따라 위 이미지들의 내용을 정확하고 상세하게 분석해주세요."
                 }
-            ] + [
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{base64_img}",
-                        "detail": image_detail
-                    }
-                } for base64_img in base64_images
             ]
         }
     ]
@@ -426,47 +1321,293 @@ def analyze_images_with_gpt(client, base64_images, prompt_type="summary", model=
         # GPT-5 모델 사용 시 더 높은 타임아웃 설정
         timeout_seconds = 180 if model.startswith("gpt-5") else 120
         
-        response = client.chat.completions.create(
+        # 긴 응답도 생성되는 대로 바로 읽을 수 있도록 스트리밍으로 받음
+        content, finish_reason = await astream_completion_text(
+            async_client,
+            st.empty(),
+            on_first_token,
             model=model,
             messages=messages,
             max_completion_tokens=max_tokens,
             timeout=timeout_seconds
         )
+        content = content.strip()
         
-        if response.choices and len(response.choices) > 0:
-            choice = response.choices[0]
-            
-            if hasattr(choice, 'message') and choice.message and choice.message.content:
-                content = choice.message.content.strip()
-                
-                if choice.finish_reason == 'length':
-                    st.warning("⚠️ 응답이 토큰 제한으로 잘렸습니다. '페이지별 개별 처리' 옵션을 사용하거나 최대 토큰 수를 늘려보세요.")
-                
-                if content:
-                    return content
-                else:
-                    st.error("응답 내용이 비어있습니다.")
-                    return None
-            else:
-                st.error("API 응답 형식이 올바르지 않습니다.")
-                return None
-        else:
-            st.error("API에서 응답을 받지 못했습니다.")
+        if not content:
+            st.error(f"{label}응답 내용이 비어있습니다.")
             return None
+        
+        if finish_reason == 'length':
+            st.warning(f"⚠️ {label}응답이 토큰 제한으로 잘렸습니다. '페이지별 개별 처리' 옵션을 사용하거나 최대 토큰 수를 늘려보세요.")
+        else:
+            store_vision_result(cache_key, content)
+        return content
             
     except Exception as e:
         error_msg = str(e)
         if "timeout" in error_msg.lower():
-            st.error("API 요청 시간 초과. 네트워크 연결을 확인하거나 이미지 수를 줄여보세요.")
+            st.error(f"{label}API 요청 시간 초과. 네트워크 연결을 확인하거나 이미지 수를 줄여보세요.")
         elif "rate limit" in error_msg.lower():
-            st.error("API 사용량 한도 초과. 잠시 후 다시 시도해주세요.")
+            st.error(f"{label}API 사용량 한도 초과. 잠시 후 다시 시도해주세요.")
         else:
-            st.error(f"API 오류: {error_msg}")
+            st.error(f"{label}API 오류: {error_msg}")
         return None
 
+async def merge_chunk_summaries(async_client, partial_summaries, model, max_tokens, label=""):
+    """구간별 요약을 문서 전체 요약 하나로 통합 (실패하거나 응답이 잘리면 구간별 요약을 그대로 반환)"""
+    st.write(f"🔧 {label}구간별 요약 통합 중...")
+    try:
+        response = await acreate_completion(
+            async_client,
+            model=model,
+            messages=[{"role": "user", "content": MERGE_SUMMARY_PROMPT.format(partial_summaries=partial_summaries)}],
+            max_completion_tokens=max_tokens,
+            timeout=180 if model.startswith("gpt-5") else 120
+        )
+        if response.choices and response.choices[0].message.content and response.choices[0].finish_reason != 'length':
+            return response.choices[0].message.content.strip()
+        st.warning(f"{label}요약 통합 응답이 비었거나 잘려서 구간별 요약을 그대로 사용합니다.")
+    except Exception as e:
+        st.warning(f"{label}요약 통합 중 오류 발생 (구간별 요약 사용): {e}")
+    return partial_summaries
+
+async def analyze_chunks_concurrently(async_client, base64_images, page_texts, system_prompt, model, max_tokens, image_detail, chunk_ranges):
+    """일괄 처리 모드의 긴 문서를 chunk_ranges 구간별로 동시에 요청 - (이어 붙인 결과, 실패한 페이지 구간 리스트)
+    
+    문맥 길이 한도를 넘은 구간은 반으로 나눠 다시 요청"""
+    # GPT-5 모델 사용 시 더 높은 타임아웃 설정
+    timeout_seconds = 180 if model.startswith("gpt-5") else 120
+    
+    async def analyze_chunk(async_client, start, end):
+        page_label = f"{start + 1}~{end}" if end - start > 1 else str(start + 1)
+        messages = [
+            {
+                "role": "user",
+                "content": build_page_content_parts(base64_images[start:end], page_texts[start:end], image_detail, start + 1) + [
+                    {
+                        "type": "text",
+                        "text": f"{system_prompt}\n\n위 규칙에 따라 위 이미지들({page_label}페이지)의 내용을 정확하고 상세하게 분석해주세요."
+                    }
+                ]
+            }
+        ]
+        try:
+            # 동시 요청 수는 처리 유형과 관계없이 클라이언트 단위로 제한
+            response = await acreate_completion(
+                async_client,
+                model=model,
+                messages=messages,
+                max_completion_tokens=max_tokens,
+                timeout=timeout_seconds
+            )
+        except BadRequestError as e:
+            if getattr(e, "code", None) == "context_length_exceeded" and end - start > 1:
+                st.info(f"페이지 {page_label}: 문맥 길이 한도를 넘어 반으로 나눠 다시 처리합니다.")
+                middle = (start + end) // 2
+                halves = await asyncio.gather(analyze_chunk(async_client, start, middle), analyze_chunk(async_client, middle, end))
+                return halves[0] + halves[1]
+            st.error(f"페이지 {page_label} 처리 오류: {e}")
+            return [(page_label, None)]
+        except Exception as e:
+            st.error(f"페이지 {page_label} 처리 오류: {e}")
+            return [(page_label, None)]
+        
+        if response.choices and response.choices[0].message and response.choices[0].message.content:
+            choice = response.choices[0]
+            if choice.finish_reason == 'length':
+                st.warning(f"⚠️ 페이지 {page_label}: 응답이 토큰 제한으로 잘렸습니다. 최대 토큰 수를 늘려보세요.")
+            return [(page_label, choice.message.content.strip())]
+        return [(page_label, None)]
+    
+    chunk_results = await asyncio.gather(*(
+        analyze_chunk(async_client, start, end) for start, end in chunk_ranges
+    ))
+    
+    parts = [part for chunk_result in chunk_results for part in chunk_result]
+    failed_ranges = [page_label for page_label, content in parts if not content]
+    content = "\n\n".join(content or f"❌ [페이지 {page_label} 처리 실패]" for page_label, content in parts)
+    return content, failed_ranges
+
+def analyze_images_combined(client, base64_images, model, max_tokens, image_detail, page_texts=None):
+    """일괄 처리 모드에서 요약과 번역을 한 요청으로 받기 (실패하면 None - 유형별 요청으로 대체)"""
+    page_texts = page_texts or [""] * len(base64_images)
+    cache_key = vision_cache_key([text or img for text, img in zip(page_texts, base64_images)], "combined", model, max_tokens, image_detail)
+    cached_result = get_cached_vision_result(cache_key)
+    if cached_result:
+        st.write(f"♻️ {len(base64_images)}개 이미지의 이전 분석 결과를 재사용합니다.")
+        return dict(cached_result)
+    
+    st.write(f"🔍 {len(base64_images)}개 이미지 요약과 번역을 한 번에 처리 중...")
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": f"{build_combined_prompt(BATCH_SUMMARY_PROMPT, BATCH_TRANSLATION_PROMPT)}\n\n위 규칙에 따라 다음 이미지들의 내용을 정확하고 상세하게 분석해주세요."
+                }
+            ] + build_page_content_parts(base64_images, page_texts, image_detail)
+        }
+    ]
+    
+    try:
+        # 두 결과를 함께 생성하므로 토큰 한도는 두 배
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_completion_tokens=max_tokens * 2,
+            timeout=360 if model.startswith("gpt-5") else 240,
+            response_format=COMBINED_RESPONSE_FORMAT
+        )
+        outputs = parse_combined_response(response)
+    except Exception as e:
+        st.warning(f"요약/번역 통합 처리 오류 (유형별로 다시 처리합니다): {e}")
+        return None
+    
+    if not outputs:
+        st.info("요약/번역 통합 응답이 잘렸거나 형식이 맞지 않아 유형별로 다시 처리합니다.")
+        return None
+    store_vision_result(cache_key, outputs)
+    return outputs
+
+def analyze_document_with_gpt(client, base64_images, prompt_types, total_pages, model="gpt-4o-mini", max_tokens=4000, image_detail="high", process_separately=False, pages_per_request=PAGES_PER_REQUEST, polish_with_llm=False, boilerplate_lines=frozenset(), page_texts=None):
+    """여러 처리 유형(요약, 번역)을 함께 실행하고 {처리 유형: 결과} 반환
+    
+    개별 처리 모드에서는 페이지를 한 번만 렌더링하고 모든 유형의 요청을 동시에 보냄"""
+    if client and process_separately and total_pages > 1:
+        report_text_pages(page_texts)
+        return analyze_pages_separately(
+            client, base64_images, total_pages, prompt_types, model, max_tokens, image_detail,
+            pages_per_request, polish_with_llm, boilerplate_lines, page_texts
+        )
+    
+    # 일괄 처리 모드 - 요약과 번역은 한 요청으로, 실패하면 유형별 요청을 동시에 (이미지는 한 번만 만들어 재사용)
+    if not client:
+        st.error("OpenAI 클라이언트가 초기화되지 않았습니다.")
+        return {prompt_type: None for prompt_type in prompt_types}
+    
+    base64_images = list(base64_images)
+    if not base64_images:
+        st.error("처리할 이미지가 없습니다.")
+        return {prompt_type: None for prompt_type in prompt_types}
+    
+    report_text_pages(page_texts)
+    page_texts = page_texts or [""] * len(base64_images)
+    # 너무 큰 이미지는 통합 요청과 유형별 요청 모두 보내기 전에 걸러냄
+    if not check_batch_image_sizes(base64_images, page_texts):
+        return {prompt_type: None for prompt_type in prompt_types}
+    # 통합 요청은 두 결과를 함께 받으므로 출력 토큰을 max_tokens * 2만큼 남겨 둠
+    fits_one_request = len(pack_page_chunks(
+        base64_images, page_texts, image_detail, max_tokens * 2,
+        build_combined_prompt(BATCH_SUMMARY_PROMPT, BATCH_TRANSLATION_PROMPT)
+    )) == 1
+    if fits_one_request and set(prompt_types) == {"summary", "translation"}:
+        outputs = analyze_images_combined(client, base64_images, model, max_tokens, image_detail, page_texts)
+        if outputs:
+            return outputs
+    
+    return asyncio.run(analyze_batch_types(
+        client, base64_images, prompt_types, model, max_tokens, image_detail, page_texts
+    ))
+
+# OpenAI Batch API로 처리 (비용 50% 절감, 결과는 최대 24시간 뒤에 확인)
+def submit_batch_analysis(client, base64_images, page_texts, prompt_types, total_pages, model, max_tokens, image_detail, file_hash):
+    """페이지별, 처리 유형별 요청을 Batch API 작업 하나로 제출하고 작업 ID 반환 (실패하면 None)
+    
+    custom_id는 "처리 유형-페이지 번호" - 처리 유형, 페이지 수, 문서 해시는 작업 metadata에 저장해
+    세션이 바뀌어도 작업 ID만으로 collect_batch_analysis에서 결과를 확인할 수 있음"""
+    buffer = BytesIO()
+    for page_num, base64_img in enumerate(base64_images, start=1):
+        text = page_texts[page_num - 1] if page_texts else ""
+        if not text and not check_image_size(page_num, base64_img):
+            return None
+        for prompt_type in prompt_types:
+            system_prompt = build_page_prompt(prompt_type, page_num, total_pages)
+            request = {
+                "custom_id": f"{prompt_type}-{page_num}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": text_page_messages(system_prompt, text) if text else image_page_messages(system_prompt, base64_img, image_detail),
+                    "max_completion_tokens": max_tokens
+                }
+            }
+            buffer.write(json.dumps(request, ensure_ascii=False).encode('utf-8'))
+            buffer.write(b"\n")
+    
+    if buffer.tell() > BATCH_API_MAX_FILE_BYTES:
+        st.error(f"Batch API 입력 파일이 너무 큽니다 ({buffer.tell()/1024/1024:.1f}MB). 이미지 해상도를 낮추거나 페이지 범위를 줄여주세요.")
+        return None
+    
+    try:
+        input_file = client.files.create(file=("pdf_analysis_batch.jsonl", buffer.getvalue()), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=BATCH_API_COMPLETION_WINDOW,
+            metadata={
+                "prompt_types": ",".join(prompt_types),
+                "total_pages": str(total_pages),
+                "file_hash": file_hash
+            }
+        )
+    except Exception as e:
+        st.error(f"Batch API 작업 제출 중 오류 발생: {e}")
+        return None
+    return batch.id
+
+def collect_batch_analysis(client, batch_id):
+    """Batch API 작업 상태 확인 - 끝났으면 ({처리 유형: 최종 결과}, 제출한 문서 해시), 아직 처리 중이거나 받을 결과가 없으면 (None, None)"""
+    try:
+        batch = client.batches.retrieve(batch_id)
+    except Exception as e:
+        st.error(f"Batch API 작업 조회 중 오류 발생: {e}")
+        return None, None
+    
+    metadata = batch.metadata or {}
+    if not metadata.get("prompt_types") or not metadata.get("total_pages"):
+        st.error("이 프로그램에서 제출한 Batch API 작업이 아닙니다.")
+        return None, None
+    prompt_types = metadata["prompt_types"].split(",")
+    total_pages = int(metadata["total_pages"])
+    # 머리말/꼬리말 목록은 같은 문서가 열려 있을 때만 사용 (다른 문서면 로컬 연결만 적용)
+    boilerplate_lines = frozenset()
+    if metadata.get("file_hash") == st.session_state.get('last_file_hash'):
+        boilerplate_lines = st.session_state.boilerplate_lines
+    
+    if batch.status in BATCH_API_PENDING_STATUSES:
+        counts = batch.request_counts
+        progress = f" ({counts.completed}/{counts.total})" if counts and counts.total else ""
+        st.info(f"⏳ 아직 처리 중입니다{progress}. 잠시 후 다시 확인해주세요.")
+        return None, None
+    if not batch.output_file_id:
+        st.error(f"Batch API 작업이 완료되지 못했습니다 (상태: {batch.status}).")
+        st.session_state.batch_job_id = None
+        return None, None
+    if batch.status != "completed":
+        # 만료/취소된 작업도 끝난 요청의 결과(과금됨)는 출력 파일에 남아 있으므로 받아옴
+        st.warning(f"⚠️ Batch API 작업이 '{batch.status}' 상태로 끝났습니다. 처리된 페이지의 결과만 가져옵니다.")
+    
+    # 실패했거나 처리되지 않은 요청은 출력 파일에 없으므로 해당 페이지는 실패로 표시됨
+    page_results = {prompt_type: [None] * total_pages for prompt_type in prompt_types}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        item = json.loads(line)
+        choices = ((item.get("response") or {}).get("body") or {}).get("choices") or []
+        if not choices or not choices[0]["message"].get("content"):
+            continue
+        prompt_type, page_num = item["custom_id"].rsplit("-", 1)
+        page_results[prompt_type][int(page_num) - 1] = choices[0]["message"]["content"].strip()
+    
+    show_label = len(prompt_types) > 1
+    return {
+        prompt_type: finish_page_results(results, prompt_type, boilerplate_lines, show_label)[0]
+        for prompt_type, results in page_results.items()
+    }, metadata.get("file_hash")
+
 # QMD 파일 저장 (Quarto Markdown) - 에러 처리 개선
 def save_to_qmd(filename, **sections):
-    """Quarto Markdown 파일로 저장"""
+    """Quarto Markdown 파일로 저장 (filename은 경로 또는 바이너리 파일 객체)"""
     try:
         content_lines = []
         
@@ -497,8 +1638,12 @@ def save_to_qmd(filename, **sections):
         if content_lines and content_lines[-2] == "---":
             content_lines = content_lines[:-2]
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(content_lines))
+        qmd_text = '\n'.join(content_lines)
+        if isinstance(filename, (str, os.PathLike)):
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(qmd_text)
+        else:
+            filename.write(qmd_text.encode('utf-8'))
         return True
     except Exception as e:
         st.error(f"QMD 파일 저장 오류: {e}")
@@ -657,27 +1802,157 @@ def save_to_pdf(filename, **sections):
         st.warning(f"PDF 생성 중 오류 발생: {e}. Word 파일을 사용해주세요.")
         return False
 
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_DOCUMENTS)
+def build_download_file(file_type, results):
+    """분석 결과를 다운로드 파일(docx/pdf/qmd) 바이트로 변환 - 같은 결과면 캐시에서 반환 (실패하면 None)"""
+    save_functions = {"docx": save_to_word, "pdf": save_to_pdf, "qmd": save_to_qmd}
+    buffer = BytesIO()
+    if save_functions[file_type](buffer, **results):
+        return buffer.getvalue()
+    return None
+
 # 세션 상태 초기화 함수 추가
 def initialize_session_state():
     """세션 상태 초기화"""
     defaults = {
-        "images": [],
-        "base64_images": [],
+        "pdf_data": None,
+        "pdf_doc": None,
+        "page_count": 0,
+        "page_texts": [],
+        "boilerplate_lines": frozenset(),
         "page_number": 1,
         "start_page": 1,
         "end_page": 1,
         "analysis_results": {},
         "last_analysis_done": False,
         "include_images": False,
-        "temp_files": [],  # 임시 파일 추적용
+        "analysis_file_hash": None,
         "api_key_validated": False,
-        "client": None
+        "client": None,
+        "batch_job_id": None,
+        "last_file_id": None
     }
     
     for key, default_value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = default_value
 
+def store_analysis_outputs(outputs, file_hash):
+    """{처리 유형: 결과}를 화면 표시용 결과로 세션에 저장 (file_hash는 결과를 만든 문서)"""
+    results = {}
+    if outputs.get("summary"):
+        results["요약 결과"] = outputs["summary"]
+    if outputs.get("translation"):
+        results["번역 결과"] = outputs["translation"]
+
+    # 결과를 세션 상태에 저장
+    if results:
+        st.session_state.analysis_results = results
+        st.session_state.analysis_file_hash = file_hash
+        st.session_state.last_analysis_done = True
+        st.success("✅ 분석 완료!")
+    else:
+        st.error("분석 결과가 없습니다. 다시 시도해주세요.")
+
+# 분석 결과 표시 - 다운로드/지우기 버튼을 눌러도 이 영역만 다시 실행 (PDF 처리와 미리보기는 건너뜀)
+@st.fragment
+def show_analysis_results(results, mode):
+    """세션에 저장된 분석 결과, 원본 이미지, 다운로드 버튼 표시"""
+    st.markdown("---")
+    # 작업 ID로 받아온 결과처럼 다른 문서의 결과면 지금 열린 문서의 이미지를 함께 표시하지 않음
+    show_images = (st.session_state.get('include_images', False)
+                   and st.session_state.analysis_file_hash == st.session_state.get('last_file_hash'))
+    
+    # 요약 결과 표시
+    if "요약 결과" in results:
+        st.subheader("📋 요약 결과")
+        st.markdown(results["요약 결과"])
+        
+        # 원본 이미지 포함 옵션 (요약용)
+        if show_images:
+            st.subheader("📸 원본 이미지 (요약)")
+            try:
+                if mode == "단일 페이지":
+                    if 0 <= st.session_state.page_number-1 < st.session_state.page_count:
+                        show_page_images([st.session_state.page_number-1], "원본 페이지")
+                elif mode == "페이지 범위":
+                    show_page_images(range(st.session_state.start_page-1, min(st.session_state.end_page, st.session_state.page_count)), "원본 페이지")
+                else:
+                    show_page_images(range(st.session_state.page_count), "원본 페이지")
+            except Exception as e:
+                st.error(f"원본 이미지 표시 오류: {e}")
+
+    # 번역 결과 표시
+    if "번역 결과" in results:
+        st.subheader("🌐 번역 결과")
+        st.markdown(results["번역 결과"])
+        
+        # 원본 이미지 포함 옵션 (번역용 - 요약이 없는 경우에만)
+        if show_images and "요약 결과" not in results:
+            st.subheader("📸 원본 이미지 (번역)")
+            try:
+                if mode == "단일 페이지":
+                    if 0 <= st.session_state.page_number-1 < st.session_state.page_count:
+                        show_page_images([st.session_state.page_number-1], "원본 페이지")
+                elif mode == "페이지 범위":
+                    show_page_images(range(st.session_state.start_page-1, min(st.session_state.end_page, st.session_state.page_count)), "원본 페이지")
+                else:
+                    show_page_images(range(st.session_state.page_count), "원본 페이지")
+            except Exception as e:
+                st.error(f"원본 이미지 표시 오류: {e}")
+
+    # 파일 다운로드 섹션
+    st.subheader("💾 결과 다운로드")
+    
+    try:
+        col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
+        
+        # 다운로드 파일은 결과가 바뀐 뒤 처음 표시할 때만 생성 (이후 재실행은 캐시 사용)
+        with col1:
+            docx_data = build_download_file("docx", results)
+            if docx_data:
+                st.download_button(
+                    "📄 Word 다운로드", 
+                    docx_data, 
+                    file_name="pdf_analysis_result.docx",
+                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                )
+            else:
+                st.error("Word 파일 생성 실패")
+                
+        with col2:
+            pdf_bytes = build_download_file("pdf", results)
+            if pdf_bytes:
+                st.download_button(
+                    "📕 PDF 다운로드", 
+                    pdf_bytes, 
+                    file_name="pdf_analysis_result.pdf",
+                    mime="application/pdf"
+                )
+            else:
+                st.warning("PDF 파일 생성 실패")
+                
+        with col3:
+            qmd_data = build_download_file("qmd", results)
+            if qmd_data:
+                st.download_button(
+                    "📝 QMD 다운로드", 
+                    qmd_data, 
+                    file_name="pdf_analysis_result.qmd",
+                    mime="text/plain"
+                )
+            else:
+                st.error("QMD 파일 생성 실패")
+                
+        with col4:
+            if st.button("🗑️ 결과 지우기"):
+                st.session_state.analysis_results = {}
+                st.session_state.last_analysis_done = False
+                st.rerun()
+
+    except Exception as e:
+        st.error(f"파일 생성 중 오류 발생: {e}")
+
 # 메인 앱
 def main():
     st.set_page_config(layout="wide", page_title="PDF Vision 번역/요약 프로그램")
@@ -725,27 +2000,41 @@ def main():
         # PDF 파일 처리
         if pdf_file:
             # 파일이 변경되었는지 확인
-            current_file_hash = hash(pdf_file.getvalue())
+            # 업로드된 바이트는 한 번만 가져와 해시 계산과 문서 열기에 함께 사용 (getvalue는 복사 없이 버퍼 반환)
+            pdf_data = pdf_file.getvalue()
+            # 내용 기준 해시라 같은 파일을 다시 올리거나 다른 세션에서 열어도 캐시를 재사용
+            # 해시는 업로드가 바뀔 때만 계산하고, 같은 업로드의 재실행에서는 세션에 저장된 값을 그대로 사용
+            if pdf_file.file_id != st.session_state.last_file_id or 'last_file_hash' not in st.session_state:
+                current_file_hash = hashlib.sha256(pdf_data).hexdigest()
+                st.session_state.last_file_id = pdf_file.file_id
+            else:
+                current_file_hash = st.session_state.last_file_hash
             if st.session_state.get('last_file_hash') != current_file_hash:
-                # 이전 임시 파일들 정리
-                cleanup_temp_files(st.session_state.temp_files)
-                st.session_state.temp_files = []
-                
-                pdf_data = pdf_file.read()
-                with st.spinner("PDF를 이미지로 변환 중..."):
-                    st.session_state.images, st.session_state.base64_images = convert_pdf_to_base64_images(pdf_data)
+                # 이전 문서 닫기 - 페이지 이미지는 표시/분석할 때 필요한 페이지만 렌더링
+                close_pdf_document(st.session_state.pdf_doc)
+                st.session_state.pdf_doc = open_pdf_document(pdf_data)
+                try:
+                    st.session_state.page_count = get_page_count(current_file_hash, pdf_data, st.session_state.pdf_doc)
+                    st.session_state.pdf_data = pdf_data
+                    # 내장 텍스트 추출과 문서 전체의 머리말/꼬리말 계산은 업로드 시 한 번만
+                    st.session_state.page_texts = extract_page_texts(current_file_hash, pdf_data)
+                    st.session_state.boilerplate_lines = detect_boilerplate_lines(st.session_state.page_texts)
+                except Exception as e:
+                    st.error(f"PDF 변환 중 오류 발생: {e}")
+                    st.session_state.page_count = 0
+                    st.session_state.pdf_data = None
+                    st.session_state.page_texts = []
+                    st.session_state.boilerplate_lines = frozenset()
                 
-                # 이미지 경로들을 임시 파일 목록에 추가
-                st.session_state.temp_files.extend(st.session_state.images)
                 st.session_state.last_file_hash = current_file_hash
                 
                 # 분석 결과 초기화
                 st.session_state.analysis_results = {}
                 st.session_state.last_analysis_done = False
             
-            total_pages = len(st.session_state.images)
+            total_pages = st.session_state.page_count
             if total_pages > 0:
-                st.success(f"총 {total_pages}페이지 변환 완료")
+                st.success(f"총 {total_pages}페이지 PDF 확인 완료")
 
                 if mode == "단일 페이지":
                     st.session_state.page_number = st.number_input(
@@ -763,27 +2052,24 @@ def main():
                 st.error("PDF 변환에 실패했습니다.")
 
     # 메인 콘텐츠
-    if pdf_file and st.session_state.images:
+    if pdf_file and st.session_state.page_count:
+        pdf_data = st.session_state.pdf_data
+        page_count = st.session_state.page_count
         left, right = st.columns([1, 1])
         
         with left:
             st.subheader("📖 문서 미리보기")
             try:
                 if mode == "단일 페이지":
-                    if 0 <= st.session_state.page_number-1 < len(st.session_state.images):
-                        st.image(st.session_state.images[st.session_state.page_number-1], 
-                                caption=f"페이지 {st.session_state.page_number}")
+                    if 0 <= st.session_state.page_number-1 < page_count:
+                        show_page_images([st.session_state.page_number-1])
                 elif mode == "페이지 범위":
-                    for i in range(st.session_state.start_page-1, min(st.session_state.end_page, len(st.session_state.images))):
-                        if i < len(st.session_state.images):
-                            st.image(st.session_state.images[i], caption=f"페이지 {i+1}")
+                    show_page_images(range(st.session_state.start_page-1, min(st.session_state.end_page, page_count)))
                 else:
                     # 전체 문서의 경우 처음 5페이지만 미리보기
-                    preview_count = min(5, len(st.session_state.images))
-                    for i in range(preview_count):
-                        st.image(st.session_state.images[i], caption=f"페이지 {i+1}")
-                    if len(st.session_state.images) > 5:
-                        st.info(f"미리보기는 처음 5페이지만 표시됩니다. (전체 {len(st.session_state.images)}페이지)")
+                    show_page_images(range(min(5, page_count)))
+                    if page_count > 5:
+                        st.info(f"미리보기는 처음 5페이지만 표시됩니다. (전체 {page_count}페이지)")
             except Exception as e:
                 st.error(f"이미지 표시 오류: {e}")
 
@@ -828,9 +2114,39 @@ def main():
                     
                     # 페이지 분할 처리 옵션
                     process_separately = st.checkbox(
-                        "페이지별 개별 처리 (문맥 연결)", 
+                        "페이지별 개별 처리", 
                         value=True,
-                        help="여러 페이지를 개별적으로 처리하되, 페이지 간 문맥을 연결하여 자연스럽게 처리 (권장)"
+                        help="여러 페이지를 묶음 단위로 동시에 처리한 뒤, 페이지 경계의 끊어진 문장과 반복 머리말/꼬리말을 로컬에서 정리해 연결 (권장). 아래 옵션으로 AI 다듬기를 추가할 수 있습니다."
+                    )
+                    
+                    # 한 요청에 묶어 보낼 페이지 수
+                    pages_per_request = st.slider(
+                        "요청당 페이지 수",
+                        1, 8, PAGES_PER_REQUEST,
+                        disabled=not process_separately,
+                        help="연속된 여러 페이지를 한 번의 요청으로 처리해 요청 수와 비용을 줄입니다. 응답이 잘리면 해당 묶음은 페이지별로 다시 처리합니다."
+                    )
+                    
+                    # 페이지 연결을 AI로 다듬을지 여부 (기본은 로컬 규칙으로 연결)
+                    polish_with_llm = st.checkbox(
+                        "AI로 페이지 연결 다듬기 (추가 비용)",
+                        value=False,
+                        disabled=not process_separately,
+                        help="기본적으로 반복 머리말/꼬리말 제거와 끊어진 문장 연결은 로컬에서 처리합니다. 선택하면 전체 결과를 한 번 더 AI로 다듬으며, 문서가 길수록 시간과 비용이 크게 늘어납니다."
+                    )
+                    
+                    # 내장 텍스트가 있는 페이지는 이미지 대신 텍스트로 처리
+                    use_native_text = st.checkbox(
+                        "텍스트가 있는 페이지는 텍스트로 처리 (비용 절감)",
+                        value=True,
+                        help=f"PDF에 내장된 텍스트가 {NATIVE_TEXT_MIN_CHARS}자를 넘고 스캔본이 아닌 페이지는 이미지 분석 대신 텍스트 요청으로 처리해 비용과 시간을 크게 줄입니다. 그림이나 복잡한 표가 많은 문서는 해제하세요."
+                    )
+                    
+                    # 결과를 바로 받지 않는 대신 비용이 절반인 Batch API로 처리
+                    use_batch_api = st.checkbox(
+                        "Batch API로 처리 (비용 50% 절감, 최대 24시간 소요)",
+                        value=False,
+                        help="페이지별 요청을 OpenAI Batch API 작업으로 제출합니다. 결과는 즉시 나오지 않으며, 나중에 '배치 결과 확인' 버튼으로 받아옵니다. 긴 문서를 급하지 않게 처리할 때 사용하세요."
                     )
                     
                     # GPT-5 사용 시 추가 안내
@@ -846,214 +2162,92 @@ def main():
                 # 분석 시작 버튼
                 analysis_disabled = not (do_summary or do_translation) or not st.session_state.api_key_validated
                 if st.button("🚀 AI 분석 시작", disabled=analysis_disabled):
-                    if not st.session_state.base64_images:
+                    if not pdf_data:
                         st.error("처리할 이미지가 없습니다.")
                     else:
-                        # 선택된 페이지의 이미지만 추출
+                        # 선택된 페이지 번호만 추출 (이미지는 분석하면서 한 장씩 렌더링)
                         try:
                             if mode == "단일 페이지":
-                                if 0 <= st.session_state.page_number-1 < len(st.session_state.base64_images):
-                                    selected_images = [st.session_state.base64_images[st.session_state.page_number-1]]
+                                if 0 <= st.session_state.page_number-1 < page_count:
+                                    selected_pages = [st.session_state.page_number-1]
                                 else:
                                     st.error("선택한 페이지가 범위를 벗어났습니다.")
-                                    selected_images = []
+                                    selected_pages = []
                             elif mode == "페이지 범위":
                                 start_idx = max(0, st.session_state.start_page-1)
-                                end_idx = min(len(st.session_state.base64_images), st.session_state.end_page)
-                                selected_images = st.session_state.base64_images[start_idx:end_idx]
+                                end_idx = min(page_count, st.session_state.end_page)
+                                selected_pages = list(range(start_idx, end_idx))
                             else:
-                                selected_images = st.session_state.base64_images
+                                selected_pages = list(range(page_count))
 
-                            if not selected_images:
+                            if not selected_pages:
                                 st.error("선택된 페이지가 없습니다.")
                             else:
-                                results = {}
+                                # 텍스트로 처리할 페이지의 본문 (머리말/꼬리말 제외, 빈 문자열이면 이미지로 처리)
+                                page_texts = [
+                                    native_text_for_analysis(st.session_state.page_texts[page], st.session_state.boilerplate_lines)
+                                    for page in selected_pages
+                                ] if use_native_text else None
                                 
-                                # 요약 처리
-                                if do_summary:
-                                    with st.spinner("📋 문서 요약 중..."):
-                                        summary = analyze_images_with_gpt(
-                                            client=client, 
-                                            base64_images=selected_images, 
-                                            prompt_type="summary", 
-                                            model=model_option, 
-                                            max_tokens=max_tokens, 
-                                            image_detail=image_detail, 
-                                            process_separately=process_separately
+                                # 요약과 번역을 함께 처리 (개별 처리 모드에서는 두 요청을 페이지별로 동시에 전송)
+                                prompt_types = [
+                                    prompt_type for prompt_type, selected in
+                                    (("summary", do_summary), ("translation", do_translation)) if selected
+                                ]
+                                if use_batch_api:
+                                    with st.spinner("📦 Batch API 작업 제출 중..."):
+                                        batch_id = submit_batch_analysis(
+                                            client, iter_analysis_inputs(selected_pages, page_texts, image_detail), page_texts,
+                                            prompt_types, len(selected_pages), model_option, max_tokens, image_detail,
+                                            st.session_state.last_file_hash
                                         )
-                                        if summary:
-                                            results["요약 결과"] = summary
-
-                                # 번역 처리
-                                if do_translation:
-                                    with st.spinner("🌐 문서 번역 중..."):
-                                        translation = analyze_images_with_gpt(
+                                    if batch_id:
+                                        st.session_state.batch_job_id = batch_id
+                                        st.success(f"📦 Batch API 작업 제출됨 (작업 ID: {batch_id}) - 나중에 결과를 받으려면 작업 ID를 기록해두세요.")
+                                else:
+                                    spinner_text = "📋 문서 요약 및 번역 중..." if len(prompt_types) > 1 else (
+                                        "📋 문서 요약 중..." if do_summary else "🌐 문서 번역 중...")
+                                    with st.spinner(spinner_text):
+                                        outputs = analyze_document_with_gpt(
                                             client=client,
-                                            base64_images=selected_images, 
-                                            prompt_type="translation", 
+                                            base64_images=iter_analysis_inputs(selected_pages, page_texts, image_detail),
+                                            prompt_types=prompt_types,
+                                            total_pages=len(selected_pages),
                                             model=model_option,
-                                            max_tokens=max_tokens, 
-                                            image_detail=image_detail, 
-                                            process_separately=process_separately
+                                            max_tokens=max_tokens,
+                                            image_detail=image_detail,
+                                            process_separately=process_separately,
+                                            pages_per_request=pages_per_request,
+                                            polish_with_llm=polish_with_llm,
+                                            boilerplate_lines=st.session_state.boilerplate_lines,
+                                            page_texts=page_texts
                                         )
-                                        if translation:
-                                            results["번역 결과"] = translation
-
-                                # 결과를 세션 상태에 저장
-                                if results:
-                                    st.session_state.analysis_results = results
-                                    st.session_state.last_analysis_done = True
-                                    st.success("✅ 분석 완료!")
-                                else:
-                                    st.error("분석 결과가 없습니다. 다시 시도해주세요.")
+                                    store_analysis_outputs(outputs, st.session_state.last_file_hash)
                         
                         except Exception as e:
                             st.error(f"분석 중 오류 발생: {e}")
     
+    # Batch API 결과 확인 - 작업 ID만 있으면 새로고침하거나 다른 문서를 열어도 받아올 수 있음
+    # (방금 제출한 작업 ID도 채워지도록 분석 버튼 처리 뒤에 사이드바에 추가)
+    with st.sidebar:
+        if client:
+            with st.expander("📦 Batch API 결과 확인", expanded=bool(st.session_state.batch_job_id)):
+                batch_id = st.text_input(
+                    "작업 ID",
+                    value=st.session_state.batch_job_id or "",
+                    placeholder="batch_...",
+                    help="Batch API로 제출한 작업의 ID를 입력하세요. 이 세션에서 제출한 작업은 자동으로 채워집니다."
+                ).strip()
+                if st.button("🔄 배치 결과 확인", disabled=not batch_id):
+                    with st.spinner("Batch API 결과 확인 중..."):
+                        outputs, file_hash = collect_batch_analysis(client, batch_id)
+                    if outputs is not None:
+                        st.session_state.batch_job_id = None
+                        store_analysis_outputs(outputs, file_hash)
+    
     # 분석 결과 표시 (세션 상태에서 가져오기)
     if st.session_state.last_analysis_done and st.session_state.analysis_results:
-        results = st.session_state.analysis_results
-        
-        st.markdown("---")
-        
-        # 요약 결과 표시
-        if "요약 결과" in results:
-            st.subheader("📋 요약 결과")
-            st.markdown(results["요약 결과"])
-            
-            # 원본 이미지 포함 옵션 (요약용)
-            if st.session_state.get('include_images', False):
-                st.subheader("📸 원본 이미지 (요약)")
-                try:
-                    if mode == "단일 페이지":
-                        if 0 <= st.session_state.page_number-1 < len(st.session_state.images):
-                            st.image(st.session_state.images[st.session_state.page_number-1], 
-                                    caption=f"원본 페이지 {st.session_state.page_number}")
-                    elif mode == "페이지 범위":
-                        for i in range(st.session_state.start_page-1, min(st.session_state.end_page, len(st.session_state.images))):
-                            if i < len(st.session_state.images):
-                                st.image(st.session_state.images[i], caption=f"원본 페이지 {i+1}")
-                    else:
-                        for i, img in enumerate(st.session_state.images):
-                            st.image(img, caption=f"원본 페이지 {i+1}")
-                except Exception as e:
-                    st.error(f"원본 이미지 표시 오류: {e}")
-
-        # 번역 결과 표시
-        if "번역 결과" in results:
-            st.subheader("🌐 번역 결과")
-            st.markdown(results["번역 결과"])
-            
-            # 원본 이미지 포함 옵션 (번역용 - 요약이 없는 경우에만)
-            if st.session_state.get('include_images', False) and "요약 결과" not in results:
-                st.subheader("📸 원본 이미지 (번역)")
-                try:
-                    if mode == "단일 페이지":
-                        if 0 <= st.session_state.page_number-1 < len(st.session_state.images):
-                            st.image(st.session_state.images[st.session_state.page_number-1], 
-                                    caption=f"원본 페이지 {st.session_state.page_number}")
-                    elif mode == "페이지 범위":
-                        for i in range(st.session_state.start_page-1, min(st.session_state.end_page, len(st.session_state.images))):
-                            if i < len(st.session_state.images):
-                                st.image(st.session_state.images[i], caption=f"원본 페이지 {i+1}")
-                    else:
-                        for i, img in enumerate(st.session_state.images):
-                            st.image(img, caption=f"원본 페이지 {i+1}")
-                except Exception as e:
-                    st.error(f"원본 이미지 표시 오류: {e}")
-
-        # 파일 다운로드 섹션
-        st.subheader("💾 결과 다운로드")
-        
-        temp_files_for_cleanup = []
-        
-        try:
-            # Word 파일 생성
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp_docx:
-                if save_to_word(tmp_docx.name, **results):
-                    tmp_docx_path = tmp_docx.name
-                    temp_files_for_cleanup.append(tmp_docx_path)
-                else:
-                    tmp_docx_path = None
-
-            # PDF 파일 생성
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_pdf:
-                if save_to_pdf(tmp_pdf.name, **results):
-                    tmp_pdf_path = tmp_pdf.name
-                    temp_files_for_cleanup.append(tmp_pdf_path)
-                else:
-                    tmp_pdf_path = None
-                
-            # QMD 파일 생성
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".qmd") as tmp_qmd:
-                if save_to_qmd(tmp_qmd.name, **results):
-                    tmp_qmd_path = tmp_qmd.name
-                    temp_files_for_cleanup.append(tmp_qmd_path)
-                else:
-                    tmp_qmd_path = None
-
-            col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
-            
-            with col1:
-                if tmp_docx_path:
-                    try:
-                        with open(tmp_docx_path, "rb") as f:
-                            docx_data = f.read()
-                            st.download_button(
-                                "📄 Word 다운로드", 
-                                docx_data, 
-                                file_name="pdf_analysis_result.docx",
-                                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                            )
-                    except Exception as e:
-                        st.error(f"Word 파일 읽기 오류: {e}")
-                else:
-                    st.error("Word 파일 생성 실패")
-                    
-            with col2:
-                if tmp_pdf_path:
-                    try:
-                        with open(tmp_pdf_path, "rb") as f:
-                            pdf_data = f.read()
-                            st.download_button(
-                                "📕 PDF 다운로드", 
-                                pdf_data, 
-                                file_name="pdf_analysis_result.pdf",
-                                mime="application/pdf"
-                            )
-                    except Exception as e:
-                        st.error(f"PDF 파일 읽기 오류: {e}")
-                else:
-                    st.warning("PDF 파일 생성 실패")
-                    
-            with col3:
-                if tmp_qmd_path:
-                    try:
-                        with open(tmp_qmd_path, "rb") as f:
-                            qmd_data = f.read()
-                            st.download_button(
-                                "📝 QMD 다운로드", 
-                                qmd_data, 
-                                file_name="pdf_analysis_result.qmd",
-                                mime="text/plain"
-                            )
-                    except Exception as e:
-                        st.error(f"QMD 파일 읽기 오류: {e}")
-                else:
-                    st.error("QMD 파일 생성 실패")
-                    
-            with col4:
-                if st.button("🗑️ 결과 지우기"):
-                    st.session_state.analysis_results = {}
-                    st.session_state.last_analysis_done = False
-                    st.rerun()
-
-        except Exception as e:
-            st.error(f"파일 생성 중 오류 발생: {e}")
-        
-        finally:
-            # 임시 파일 정리
-            cleanup_temp_files(temp_files_for_cleanup)
+        show_analysis_results(st.session_state.analysis_results, mode)
 
     # 사용법 안내
     if not pdf_file:
@@ -1072,23 +2266,10 @@ def main():
         - **시각적 요소 분석**: 표, 그래프, 다이어그램도 함께 분석
         - **컨텍스트 이해**: 문서 구조와 레이아웃을 고려한 분석
         - **고품질 번역/요약**: GPT-5의 최고급 언어 능력 또는 GPT-4o의 균형잡힌 성능 활용
-        - **문맥 연결**: 페이지 간 이어지는 내용을 자연스럽게 연결 처리
+        - **페이지 연결**: 페이지 경계의 끊어진 문장을 이어 붙이고 반복 머리말/꼬리말 제거 (선택 시 AI로 한 번 더 다듬기)
         - **다양한 모델**: GPT-4o부터 최신 GPT-5까지 다양한 모델 선택 가능
         - **안정성 향상**: 에러 처리 및 메모리 관리 개선
         """)
 
-# 앱 종료 시 정리 작업
-@st.cache_resource
-def cleanup_on_exit():
-    """앱 종료 시 임시 파일 정리"""
-    def cleanup():
-        if 'temp_files' in st.session_state:
-            cleanup_temp_files(st.session_state.temp_files)
-    
-    import atexit
-    atexit.register(cleanup)
-    return True
-
 if __name__ == "__main__":
-    cleanup_on_exit()
     main()